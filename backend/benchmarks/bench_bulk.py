@@ -0,0 +1,54 @@
+"""
+Product creation throughput: one POST per product vs. bulk requests.
+
+    python -m benchmarks.bench_bulk --products 2000 --batch 500
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import (
+    asgi_client, auth_headers, create_schema, report, seed_user, use_benchmark_database,
+)
+
+
+def item(i):
+    return {"name": f"Product {i}", "description": f"Synced product {i}", "price": 1 + i % 100}
+
+
+async def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+
+    from main import app
+    headers = auth_headers(user)
+
+    results = []
+    async with asgi_client(app) as client:
+        start = time.perf_counter()
+        for i in range(args.products):
+            response = await client.post("/api/products/", json=item(i), headers=headers)
+            assert response.status_code == 201
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for offset in range(0, args.products, args.batch):
+            items = [item(i) for i in range(offset, min(offset + args.batch, args.products))]
+            response = await client.post("/api/products/bulk", json={"items": items}, headers=headers)
+            assert response.json()["succeeded"] == len(items)
+        bulk = time.perf_counter() - start
+
+    results.append({"name": "create_single", "products": args.products, "elapsed_s": round(single, 4),
+                    "products_per_s": round(args.products / single, 1)})
+    results.append({"name": "create_bulk", "products": args.products, "batch": args.batch,
+                    "elapsed_s": round(bulk, 4), "products_per_s": round(args.products / bulk, 1),
+                    "speedup": round(single / bulk, 1)})
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
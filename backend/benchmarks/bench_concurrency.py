@@ -0,0 +1,50 @@
+"""
+Concurrent request throughput for the product endpoints.
+
+    python -m benchmarks.bench_concurrency --requests 2000 --concurrency 50
+
+Fires product list and detail requests concurrently at the ASGI app and
+reports throughput and latency percentiles as JSON.
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import (
+    asgi_client, auth_headers, create_schema, drive, report, seed_products,
+    seed_user, summarize, use_benchmark_database,
+)
+
+
+async def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+    seed_products(engine, user["id"], args.products)
+
+    from main import app
+    headers = auth_headers(user)
+
+    results = []
+    async with asgi_client(app) as client:
+        first = (await client.get("/api/products/?limit=1", headers=headers)).json()[0]
+
+        async def list_page(i):
+            response = await client.get(f"/api/products/?skip={(i * 100) % args.products}&limit=100", headers=headers)
+            assert response.status_code == 200
+
+        async def detail(i):
+            response = await client.get(f"/api/products/{first['id']}", headers=headers)
+            assert response.status_code == 200
+
+        for name, send in (("list_products", list_page), ("read_product", detail)):
+            latencies, elapsed = await drive(send, args.requests, args.concurrency)
+            results.append(summarize(name, latencies, elapsed, concurrency=args.concurrency))
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
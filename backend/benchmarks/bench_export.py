@@ -0,0 +1,69 @@
+"""
+Streaming export vs. paging the list endpoint.
+
+    python -m benchmarks.bench_export --products 200000
+
+Reports time to first byte, total time and peak Python memory (tracemalloc)
+of the streaming export, and the total time of dumping the same rows
+100 at a time as ORM objects validated through ProductResponse.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.common import (
+    create_schema, report, seed_products, seed_user, use_benchmark_database,
+)
+
+
+async def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+    seed_products(engine, user["id"], args.products)
+
+    from sqlalchemy import select
+    from db.database import SessionLocal
+    from models.models import Product
+    from routers.products import stream_products
+    from schemas.schemas import ProductResponse
+
+    results = []
+    for format in ("ndjson", "csv"):
+        # Timed pass
+        start = time.perf_counter()
+        first_chunk = None
+        size = 0
+        async for chunk in stream_products(format):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start
+            size += len(chunk)
+        elapsed = time.perf_counter() - start
+
+        # Memory pass (tracemalloc slows everything down, so not timed)
+        tracemalloc.start()
+        async for chunk in stream_products(format):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append({"name": f"export_{format}", "products": args.products,
+                        "first_chunk_ms": round(first_chunk * 1000, 2), "elapsed_s": round(elapsed, 3),
+                        "peak_mb": round(peak / 2**20, 2), "bytes": size})
+
+    # Baseline: page through 100 ORM rows at a time, validating each page
+    start = time.perf_counter()
+    async with SessionLocal() as db:
+        for skip in range(0, args.products, 100):
+            page = (await db.scalars(select(Product).offset(skip).limit(100))).all()
+            [ProductResponse.model_validate(product).model_dump_json() for product in page]
+            db.expunge_all()
+    results.append({"name": "paged_list_dump", "products": args.products,
+                    "elapsed_s": round(time.perf_counter() - start, 3)})
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=200000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Sparse fieldsets: query time and response size of a product listing whose
+rows carry large descriptions.
+
+    python -m benchmarks.bench_fields --products 10000 --description-kb 4
+
+Projections compared on one page (``--limit`` rows, newest first):
+
+- full: every ProductResponse field (what listings returned before)
+- compact: the default listing projection, without ``description``
+- name_price: ``fields=name,price``
+
+For each one reports the median query time (SELECT of the projected columns
+only), fetch + encoding time, the end-to-end request time through the app
+(response cache disabled) and the response size.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from benchmarks.common import (
+    asgi_client, auth_headers, create_schema, report, seed_products, seed_user, use_benchmark_database,
+)
+
+PROJECTIONS = {
+    "full": "name,description,price,id,user_id,created_at,updated_at",
+    "compact": None,
+    "name_price": "name,price",
+}
+
+
+def _median_ms(samples) -> float:
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def fatten_descriptions(engine, kilobytes: float, seed: int = 0):
+    # Descriptions between half and one and a half times ``kilobytes``
+    from sqlalchemy import bindparam, select, update
+    from models.models import Product
+    rng = random.Random(seed)
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+    with engine.begin() as conn:
+        ids = conn.execute(select(Product.id)).scalars().all()
+        rows = []
+        for product_id in ids:
+            size = int(kilobytes * 1024 * rng.uniform(0.5, 1.5))
+            text = " ".join(rng.choices(words, k=size // 5 + 1))[:size]
+            rows.append({"product_id": product_id, "description": text})
+        conn.execute(
+            update(Product).where(Product.id == bindparam("product_id")).values(description=bindparam("description")),
+            rows,
+        )
+
+
+async def main(args):
+    os.environ.setdefault("PRODUCT_CACHE_BACKEND", "none")
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+    seed_products(engine, user["id"], args.products)
+    fatten_descriptions(engine, args.description_kb)
+
+    from sqlalchemy import select
+    from core.pagination import page_query
+    from core.serialization import LIST_FIELDS, encode_rows, field_columns, parse_fields
+    from db.database import SessionLocal
+    from main import app
+    from models.models import Product
+
+    headers = auth_headers(user)
+    results = []
+    async with SessionLocal() as db, asgi_client(app) as client:
+        for name, fields in PROJECTIONS.items():
+            selected = parse_fields(fields, LIST_FIELDS)
+            page = page_query(select(Product), Product, args.limit, sort="-created_at")
+            query = page.with_only_columns(*field_columns(selected, "id", "updated_at", "created_at"))
+            query_times, encode_times, request_times = [], [], []
+            params = {"limit": args.limit, "sort": "-created_at", **({"fields": fields} if fields else {})}
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                rows = (await db.execute(query)).all()
+                fetched = time.perf_counter()
+                encode_rows(rows, selected)
+                query_times.append(fetched - start)
+                encode_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                response = await client.get("/api/products/", params=params, headers=headers)
+                request_times.append(time.perf_counter() - start)
+                response.raise_for_status()
+            results.append({
+                "name": name,
+                "products": args.products,
+                "page_size": args.limit,
+                "description_kb": args.description_kb,
+                "fields": list(selected),
+                "query_ms": _median_ms(query_times),
+                "fetch_and_encode_ms": _median_ms(encode_times),
+                "request_ms": _median_ms(request_times),
+                "response_bytes": len(response.content),
+            })
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--description-kb", type=float, default=4)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""
+Concurrent product creation: one commit per request vs. group commit.
+
+    python -m benchmarks.bench_group_commit --requests 2000 --concurrency 200
+
+Fires ``--requests`` ``POST /api/products/`` calls with ``--concurrency`` in
+flight, first with a commit per request, then with the group commit
+coalescer (GROUP_COMMIT_ENABLED) for each ``--windows`` value. Reports
+throughput, latency percentiles, the number of commits and the mean batch
+size. Failed requests are counted in ``errors``.
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.common import (
+    asgi_client, auth_headers, create_schema, drive, report, seed_user, summarize, use_benchmark_database,
+)
+
+
+def item(i):
+    return {"name": f"Product {i}", "description": f"Flash sale product {i}", "price": 1 + i % 100}
+
+
+async def main(args):
+    # Writes only: keep the response cache and the auth limiter out of the way
+    os.environ.setdefault("PRODUCT_CACHE_BACKEND", "none")
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+
+    from core.writebatch import WriteCoalescer
+    from db.database import SessionLocal
+    from main import app
+    from models.models import Product
+    import routers.products as products
+    headers = auth_headers(user)
+
+    async def run(name: str, **extra):
+        errors = []
+        async with asgi_client(app) as client:
+            async def send(i):
+                # SQLite answers concurrent writers with "database is locked"
+                try:
+                    response = await client.post("/api/products/", json=item(i), headers=headers)
+                    if response.status_code != 201:
+                        errors.append(response.status_code)
+                except Exception as exc:
+                    errors.append(type(exc).__name__)
+            latencies, elapsed = await drive(send, args.requests, args.concurrency)
+        return summarize(name, latencies, elapsed, concurrency=args.concurrency, errors=len(errors), **extra)
+
+    results = [await run("commit_per_request", commits=args.requests)]
+    products.GROUP_COMMIT_ENABLED = True
+    for window in args.windows:
+        writer = products.product_writer = WriteCoalescer(
+            SessionLocal, Product.__table__, window_ms=window, max_batch=args.max_batch)
+        result = await run("group_commit", window_ms=window, max_batch=args.max_batch)
+        await writer.stop()
+        stats = writer.stats()
+        result.update(commits=stats["batches"], avg_batch_size=stats["avg_batch_size"],
+                      speedup=round(result["throughput_rps"] / results[0]["throughput_rps"], 2))
+        results.append(result)
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--windows", type=lambda value: [float(window) for window in value.split(",")],
+                        default=[1, 5, 20], help="group commit windows to try, in ms")
+    parser.add_argument("--max-batch", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,125 @@
+"""
+Primary key layouts: index size and insert throughput as the table grows.
+
+    python -m benchmarks.bench_ids --rows 10000000
+
+For each id scheme a products-like table is created in a fresh database
+(``id`` primary key, ``user_id`` foreign key column, the per-owner
+``(user_id, created_at, id)`` index) and ``--rows`` rows are inserted in
+batches of ``--batch``, one transaction each:
+
+- uuid4_text: random ids as 36-character strings (the previous layout)
+- uuid7_text: time-ordered ids, still as strings
+- uuid4_binary: random ids as 16 bytes
+- uuid7_binary: time-ordered ids as 16 bytes (``CompactUUID``, the current layout)
+
+Reports overall rows/s, rows/s over the last tenth of the load (when the
+indexes no longer fit in cache, random keys fall behind) and the size of
+every index. Uses SQLite (dbstat) unless DATABASE_URL points at Postgres.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import report, sync_engine
+
+
+def _tables(metadata, id_type, name: str):
+    from sqlalchemy import Column, DateTime, Float, Index, Table
+    return Table(
+        name, metadata,
+        Column("id", id_type, primary_key=True),
+        Column("user_id", id_type),
+        Column("price", Float),
+        Column("created_at", DateTime),
+        Index(f"ix_{name}_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+
+def index_sizes(conn, table: str) -> dict:
+    from sqlalchemy import text
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(
+            "SELECT indexrelid::regclass::text, pg_relation_size(indexrelid) FROM pg_index "
+            "WHERE indrelid = CAST(:table AS regclass)"
+        ), {"table": table}).all()
+        table_bytes = conn.execute(text("SELECT pg_relation_size(CAST(:table AS regclass))"), {"table": table}).scalar()
+    else:
+        rows = conn.execute(text(
+            "SELECT name, sum(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table) GROUP BY name"
+        ), {"table": table}).all()
+        table_bytes = conn.execute(text("SELECT sum(pgsize) FROM dbstat WHERE name = :table"), {"table": table}).scalar()
+    indexes = {name: round(size / 2 ** 20, 1) for name, size in rows}
+    return {"table_mb": round(table_bytes / 2 ** 20, 1), "indexes_mb": indexes,
+            "total_index_mb": round(sum(indexes.values()), 1)}
+
+
+def measure(url: str, scheme: str, args) -> dict:
+    from datetime import datetime, timedelta
+    from sqlalchemy import MetaData, String, insert
+    from core.ids import uuid7
+    from db.types import CompactUUID
+
+    generator, layout = scheme.split("_")
+    make = uuid7 if generator == "uuid7" else uuid.uuid4
+    id_type = CompactUUID() if layout == "binary" else String(36)
+    engine = sync_engine(url)
+    metadata = MetaData()
+    table = _tables(metadata, id_type, f"ids_{scheme}")
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    rng = random.Random(0)
+    sellers = [str(make()) for _ in range(max(1, args.rows // 100))]
+    base = datetime(2024, 1, 1)
+    batch_times = []
+    for start in range(0, args.rows, args.batch):
+        rows = [
+            {"id": str(make()), "user_id": rng.choice(sellers), "price": 1.0,
+             "created_at": base + timedelta(milliseconds=i)}
+            for i in range(start, min(start + args.batch, args.rows))
+        ]
+        begin = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(table), rows)
+        batch_times.append((len(rows), time.perf_counter() - begin))
+    tail = batch_times[-max(1, len(batch_times) // 10):]
+    with engine.connect() as conn:
+        sizes = index_sizes(conn, table.name)
+    total_rows = sum(count for count, _ in batch_times)
+    result = {
+        "name": scheme,
+        "dialect": engine.dialect.name,
+        "rows": total_rows,
+        "rows_per_s": round(total_rows / sum(elapsed for _, elapsed in batch_times), 1),
+        "last_tenth_rows_per_s": round(sum(count for count, _ in tail) / sum(elapsed for _, elapsed in tail), 1),
+        **sizes,
+    }
+    if not args.keep:
+        metadata.drop_all(engine)
+    engine.dispose()
+    return result
+
+
+def main(args):
+    url = os.environ.get("DATABASE_URL")
+    results = []
+    for scheme in args.schemes:
+        # SQLite: one file per scheme so they do not share a page cache or free pages
+        scheme_url = url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), f'{scheme}.db')}"
+        results.append(measure(scheme_url, scheme, args))
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--schemes", type=lambda value: value.split(","),
+                        default=["uuid4_text", "uuid7_text", "uuid4_binary", "uuid7_binary"])
+    parser.add_argument("--keep", action="store_true", help="keep the tables (Postgres) for inspection")
+    main(parser.parse_args())
@@ -0,0 +1,66 @@
+"""
+Streaming import throughput and memory.
+
+    python -m benchmarks.bench_import --rows 200000
+
+Feeds a generated NDJSON/CSV stream (never held in memory as a whole) to
+``run_import`` and reports rows/s and peak Python memory (tracemalloc).
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from benchmarks.common import create_schema, report, seed_user, use_benchmark_database
+
+CHUNK_ROWS = 500
+
+
+async def body(format: str, rows: int):
+    # Upload-sized chunks, generated on the fly
+    if format == "csv":
+        yield b"name,description,price\n"
+    for start in range(0, rows, CHUNK_ROWS):
+        lines = []
+        for i in range(start, min(start + CHUNK_ROWS, rows)):
+            if format == "csv":
+                lines.append(f'Product {i},"Imported, product {i}",{1 + i % 100}\n')
+            else:
+                lines.append(json.dumps({"name": f"Product {i}", "description": f"Imported product {i}",
+                                         "price": 1 + i % 100}) + "\n")
+        yield "".join(lines).encode()
+
+
+async def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+
+    from db.database import SessionLocal
+    from core.imports import ImportJob, run_import
+
+    results = []
+    for format in ("ndjson", "csv"):
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            job = await run_import(db, ImportJob(user["id"], format), body(format, args.rows))
+            elapsed = time.perf_counter() - start
+        assert job.rows_imported == args.rows, job.to_dict()
+
+        # Memory pass on a smaller stream of the same shape
+        tracemalloc.start()
+        async with SessionLocal() as db:
+            await run_import(db, ImportJob(user["id"], format), body(format, args.rows // 4))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append({"name": f"import_{format}", "rows": args.rows, "elapsed_s": round(elapsed, 3),
+                        "rows_per_s": round(args.rows / elapsed, 1),
+                        "peak_mb": round(peak / 2**20, 2), "peak_mb_rows": args.rows // 4})
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    asyncio.run(main(parser.parse_args()))
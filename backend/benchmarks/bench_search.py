@@ -0,0 +1,45 @@
+"""
+Full-text search latency on a large catalogue.
+
+    python -m benchmarks.bench_search --products 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import (
+    create_schema, report, seed_products, seed_user, summarize, use_benchmark_database,
+)
+
+QUERIES = ["product", "number 123456", "benchmark 42", "missingword"]
+
+
+async def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+    start = time.perf_counter()
+    seed_products(engine, user["id"], args.products)
+    seed_time = time.perf_counter() - start
+
+    from db.database import SessionLocal
+    from db.search import search_products
+
+    results = []
+    async with SessionLocal() as db:
+        for q in QUERIES:
+            latencies = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                await search_products(db, q, limit=20)
+                latencies.append(time.perf_counter() - start)
+            results.append(summarize(f"search:{q}", latencies, sum(latencies),
+                                     products=args.products, seed_s=round(seed_time, 2)))
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+"""
+Serialization cost per 1,000 products: validated ORM path vs. fast path.
+
+    python -m benchmarks.bench_serialization --products 1000 --repeat 200
+
+- orm_validated: ORM objects -> ProductResponse validation -> pydantic JSON
+  (what list pages did before)
+- rows_validated: column rows -> ProductResponse validation -> pydantic JSON
+- rows_fast: column rows -> orjson, no validation (FAST_SERIALIZATION)
+
+Reports the median time per 1,000 products for encoding alone and for
+fetch + encoding.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import create_schema, report, seed_products, seed_user, use_benchmark_database
+
+
+def _median_ms(samples, products: int) -> float:
+    return round(statistics.median(samples) * 1000 * 1000 / products, 3)
+
+
+async def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+    seed_products(engine, user["id"], args.products)
+
+    from typing import List
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from db.database import SessionLocal
+    from models.models import Product
+    from schemas.schemas import ProductResponse
+    from core.serialization import PRODUCT_COLUMNS, encode_rows, orjson
+
+    adapter = TypeAdapter(List[ProductResponse])
+    validated = lambda items: adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+    async def orm_rows(db):
+        return (await db.scalars(select(Product))).all()
+
+    async def column_rows(db):
+        return (await db.execute(select(*PRODUCT_COLUMNS))).all()
+
+    modes = {
+        "orm_validated": (orm_rows, validated),
+        "rows_validated": (column_rows, validated),
+        "rows_fast": (column_rows, encode_rows),
+    }
+    results = []
+    async with SessionLocal() as db:
+        for name, (fetch, encode) in modes.items():
+            encode_times, total_times = [], []
+            for _ in range(args.repeat):
+                db.expunge_all()  # fresh ORM instances every round
+                start = time.perf_counter()
+                items = await fetch(db)
+                fetched = time.perf_counter()
+                encode(items)
+                done = time.perf_counter()
+                encode_times.append(done - fetched)
+                total_times.append(done - start)
+            results.append({
+                "name": name,
+                "products": args.products,
+                "repeat": args.repeat,
+                "encode_ms_per_1000": _median_ms(encode_times, args.products),
+                "fetch_and_encode_ms_per_1000": _median_ms(total_times, args.products),
+                "encoder": ("orjson" if orjson is not None else "json") if encode is encode_rows else "pydantic",
+            })
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,117 @@
+"""
+Cold start cost of a worker: importing the app, running its startup hook and
+serving the first request, each measured in a fresh interpreter.
+
+    python -m benchmarks.bench_startup --runs 15
+
+- import_ms: ``import main``
+- startup_ms: the lifespan startup (what runs before a worker accepts traffic)
+- first_request_ms: GET /api/health/live right after startup
+- total_ms: all of the above, i.e. how long a new worker takes to serve
+
+Also lists which diagnostics-only modules were already imported after
+``import main`` (they should be loaded lazily, on first use).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import create_schema, report, use_benchmark_database
+
+# Modules only the health sampler and the dev server need (platform is not
+# listed: the stdlib uuid module imports it anyway)
+LAZY_MODULES = ("psutil", "uvicorn")
+
+
+async def _lifespan_startup(app):
+    # Minimal ASGI lifespan driver: send startup, wait for the app to answer
+    import asyncio
+    received = asyncio.Queue()
+    await received.put({"type": "lifespan.startup"})
+    answered = asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        if not answered.done():
+            answered.set_result(message)
+
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, received.get, send))
+    message = await answered
+    assert message["type"] == "lifespan.startup.complete", message
+    return task, received
+
+
+async def _get(app, path: str) -> int:
+    # A bare ASGI request, so no HTTP client library is imported into the child
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+def child():
+    import asyncio
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+
+    async def serve():
+        task, received = await _lifespan_startup(main.app)
+        started = time.perf_counter()
+        assert await _get(main.app, "/api/health/live") == 200
+        served = time.perf_counter()
+        await received.put({"type": "lifespan.shutdown"})
+        await task
+        return started, served
+
+    started, served = asyncio.run(serve())
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_request_ms": (served - started) * 1000,
+        "total_ms": (served - start) * 1000,
+        "eager_modules": loaded,
+    }))
+
+
+def main(args):
+    url = use_benchmark_database()
+    create_schema(url).dispose()  # the bootstrap step, done once up front
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+            cwd=backend, env=os.environ.copy(), check=True, capture_output=True, text=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    result = {"name": "startup", "runs": args.runs}
+    for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms"):
+        result[key] = round(statistics.median(run[key] for run in runs), 1)
+    result["eager_modules"] = runs[-1]["eager_modules"]
+    result["create_tables_on_startup"] = os.environ.get("DB_CREATE_TABLES_ON_STARTUP", "false")
+    report([result])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    child() if args.child else main(args)
@@ -0,0 +1,98 @@
+"""
+Catalogue statistics: cost of serving them vs. catalogue size.
+
+    python -m benchmarks.bench_stats --sizes 10000,100000,1000000
+
+For each size a fresh database is seeded (one seller per 100 products) and
+measured:
+
+- full_list_ms: what dashboards did before, downloading every product and
+  computing the numbers client side (here: fetch + encode only)
+- load_ms: the refresher's initial load and summary computation
+- refresh_ms: one refresh after --dirty sellers wrote
+- get_global_us / get_user_us: median time to serve a summary
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import create_schema, report, use_benchmark_database
+
+
+async def measure(size: int, args) -> dict:
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from benchmarks.seed import seed
+    from core.serialization import PRODUCT_COLUMNS, encode_rows
+    from core.stats import CatalogueStats
+    from db.database import get_async_url
+    from models.models import User
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), f'stats-{size}.db')}"
+    engine = create_schema(url)
+    seed(engine, max(1, size // 100), size)
+    async_engine = create_async_engine(get_async_url(url))
+    sessions = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+    with engine.connect() as conn:
+        sellers = conn.execute(select(User.id).limit(args.dirty)).scalars().all()
+
+    async with sessions() as session:
+        start = time.perf_counter()
+        encode_rows((await session.execute(select(*PRODUCT_COLUMNS))).all())
+        full_list_ms = (time.perf_counter() - start) * 1000
+
+    catalogue = CatalogueStats(sessions)
+    catalogue.start()
+    start = time.perf_counter()
+    await catalogue.get()
+    load_ms = (time.perf_counter() - start) * 1000
+    for seller in sellers:
+        catalogue.mark_dirty(seller)
+    await catalogue.refresh()
+    refresh_ms = catalogue.last_refresh_ms
+
+    global_samples, user_samples = [], []
+    for i in range(args.repeat):
+        start = time.perf_counter()
+        await catalogue.get()
+        global_samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await catalogue.get(sellers[i % len(sellers)])
+        user_samples.append(time.perf_counter() - start)
+    # Known once the first computation has imported it (or not)
+    numpy = catalogue.stats()["numpy"]
+    await catalogue.stop()
+    await async_engine.dispose()
+    engine.dispose()
+    return {
+        "name": "stats",
+        "products": size,
+        "sellers": max(1, size // 100),
+        "numpy": numpy,
+        "full_list_ms": round(full_list_ms, 1),
+        "load_ms": round(load_ms, 1),
+        "refresh_ms": refresh_ms,
+        "dirty_sellers": len(sellers),
+        "get_global_us": round(statistics.median(global_samples) * 1e6, 2),
+        "get_user_us": round(statistics.median(user_samples) * 1e6, 2),
+    }
+
+
+async def main(args):
+    use_benchmark_database()
+    results = []
+    for size in args.sizes:
+        results.append(await measure(size, args))
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[10000, 100000, 1000000])
+    parser.add_argument("--dirty", type=int, default=10, help="sellers marked dirty before the timed refresh")
+    parser.add_argument("--repeat", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""
+Product writes: SELECT + ownership check + commit (+ refresh) vs. one
+conditional ``UPDATE/DELETE ... WHERE id AND user_id RETURNING``.
+
+    python -m benchmarks.bench_writes --products 2000 --repeat 500
+
+Runs both versions of the update and delete handlers' database work against
+the same table and reports the median latency and statements per write.
+Round trips weigh more on a networked database: point DATABASE_URL at
+Postgres to see it.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import create_schema, report, seed_products, seed_user, use_benchmark_database
+
+
+async def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    user = seed_user(engine)
+    seed_products(engine, user["id"], args.products)
+
+    from datetime import datetime
+    from sqlalchemy import delete, event, select, update
+    from core.serialization import PRODUCT_COLUMNS
+    from db.database import SessionLocal, engine as async_engine
+    from models.models import Product
+
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *a: statements.append(1))
+
+    with engine.connect() as conn:
+        ids = conn.execute(select(Product.id).order_by(Product.created_at)).scalars().all()
+    owner = user["id"]
+
+    async def update_before(db, product_id, i):
+        product = await db.scalar(select(Product).filter(Product.id == product_id))
+        assert product is not None and product.user_id == owner
+        product.price = 1 + i % 100
+        await db.commit()
+        await db.refresh(product)
+
+    async def update_after(db, product_id, i):
+        statement = (
+            update(Product)
+            .where(Product.id == product_id, Product.user_id == owner)
+            .values(price=1 + i % 100, updated_at=datetime.utcnow())
+            .returning(*PRODUCT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        assert (await db.execute(statement)).first() is not None
+        await db.commit()
+
+    async def delete_before(db, product_id, i):
+        product = await db.scalar(select(Product).filter(Product.id == product_id))
+        assert product is not None and product.user_id == owner
+        await db.delete(product)
+        await db.commit()
+
+    async def delete_after(db, product_id, i):
+        statement = (
+            delete(Product)
+            .where(Product.id == product_id, Product.user_id == owner)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        )
+        assert await db.scalar(statement) is not None
+        await db.commit()
+
+    # Deletes consume rows: each version gets its own slice of the table
+    half = min(args.repeat, len(ids) // 2)
+    cases = [
+        ("update_select_check_refresh", update_before, ids[:args.repeat]),
+        ("update_returning", update_after, ids[:args.repeat]),
+        ("delete_select_check", delete_before, ids[:half]),
+        ("delete_returning", delete_after, ids[half:2 * half]),
+    ]
+    results = []
+    for name, write, targets in cases:
+        samples = []
+        statements.clear()
+        for i, product_id in enumerate(targets):
+            # A fresh session per write, like a request
+            async with SessionLocal() as db:
+                start = time.perf_counter()
+                await write(db, product_id, i)
+                samples.append(time.perf_counter() - start)
+        results.append({
+            "name": name,
+            "writes": len(samples),
+            "p50_ms": round(statistics.median(samples) * 1000, 3),
+            "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+            "statements_per_write": round(len(statements) / len(samples), 2),
+        })
+    for before, after in ((0, 1), (2, 3)):
+        results[after]["speedup"] = round(results[before]["p50_ms"] / results[after]["p50_ms"], 2)
+    await async_engine.dispose()
+    report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,136 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Every script must call ``use_benchmark_database()`` before importing the app,
+so the engine in ``db.database`` is built against the benchmark database.
+"""
+from datetime import datetime, timedelta
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Make the backend modules importable when run as ``python -m benchmarks.<name>``
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def use_benchmark_database() -> str:
+    # Use DATABASE_URL if given, otherwise a throwaway SQLite file
+    url = os.environ.get("DATABASE_URL")
+    if not url:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        os.environ["DATABASE_URL"] = url
+    return url
+
+
+def sync_engine(url: str):
+    from sqlalchemy import create_engine
+    return create_engine(url)
+
+
+def create_schema(url: str):
+    from db.database import Base
+    import models.models  # noqa: F401  (register the models on Base)
+    import db.search  # noqa: F401  (and the search index DDL)
+    engine = sync_engine(url)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def seed_user(engine, email: str = "bench@example.com", password: str = "Bench1234!") -> dict:
+    from sqlalchemy import insert
+    from core.ids import new_id
+    from models.models import User
+    from routers.auth import pwd_context
+    user = {
+        "id": new_id(),
+        "name": "Bench User",
+        "email": email,
+        "password": pwd_context.hash(password),
+        "is_active": True,
+    }
+    with engine.begin() as conn:
+        conn.execute(insert(User), [user])
+    return user
+
+
+def seed_products(engine, user_id: str, count: int, batch_size: int = 5000):
+    # executemany-style inserts, one transaction per batch
+    from sqlalchemy import insert
+    from core.ids import new_id
+    from models.models import Product
+    base = datetime.utcnow() - timedelta(seconds=count)
+    with engine.begin() as conn:
+        for start in range(0, count, batch_size):
+            rows = [
+                {
+                    "id": new_id(),
+                    "name": f"Product {i}",
+                    "description": f"Benchmark product number {i}",
+                    "price": 1 + (i % 1000) / 10,
+                    "user_id": user_id,
+                    "created_at": base + timedelta(seconds=i),
+                    "updated_at": base + timedelta(seconds=i),
+                }
+                for i in range(start, min(start + batch_size, count))
+            ]
+            conn.execute(insert(Product), rows)
+
+
+def auth_headers(user: dict) -> dict:
+    from routers.auth import create_access_token
+    token = create_access_token({"sub": user["id"], "name": user["name"], "email": user["email"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, latencies, elapsed: float, **extra) -> dict:
+    count = len(latencies)
+    return {
+        "name": name,
+        "requests": count,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        **extra,
+    }
+
+
+async def drive(send, total: int, concurrency: int):
+    """
+    Call ``send(i)`` ``total`` times with at most ``concurrency`` in flight.
+    Returns the per-call latencies (seconds) and the wall-clock time.
+    """
+    latencies = []
+    queue = iter(range(total))
+
+    async def worker():
+        for i in queue:
+            start = time.perf_counter()
+            await send(i)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+def asgi_client(app):
+    import httpx
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def report(results):
+    # One JSON document per run so results can be diffed between releases
+    print(json.dumps(results, indent=2))
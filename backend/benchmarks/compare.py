@@ -0,0 +1,68 @@
+"""
+Compare two benchmark result files scenario by scenario.
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Accepts the documents written by ``benchmarks.scenarios`` (or any list of
+``summarize()`` results). Exits with status 1 when a scenario's throughput
+drops, or its p95/p99 latency grows, by more than ``--threshold`` percent.
+"""
+import argparse
+import json
+import sys
+
+# metric -> True when higher is better
+METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+# Metrics that fail the comparison when they regress
+GATED = ("throughput_rps", "p95_ms", "p99_ms")
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        document = json.load(f)
+    results = document["results"] if isinstance(document, dict) else document
+    return {result["name"]: result for result in results}
+
+
+def compare(baseline: dict, candidate: dict, threshold: float):
+    rows, regressions = [], []
+    for name in baseline.keys() & candidate.keys():
+        for metric, higher_is_better in METRICS.items():
+            old, new = baseline[name].get(metric), candidate[name].get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            rows.append({"name": name, "metric": metric, "baseline": old, "candidate": new,
+                         "change_pct": round(change, 1)})
+            if metric in GATED and worse > threshold:
+                regressions.append(rows[-1])
+    rows.sort(key=lambda row: (row["name"], list(METRICS).index(row["metric"])))
+    return rows, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression, in percent")
+    parser.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    args = parser.parse_args()
+
+    baseline, candidate = load_results(args.baseline), load_results(args.candidate)
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    if args.json:
+        print(json.dumps({"comparison": rows, "regressions": regressions}, indent=2))
+    else:
+        for row in rows:
+            flag = "  REGRESSION" if row in regressions else ""
+            print(f"{row['name']:<24} {row['metric']:<16} {row['baseline']:>12} -> {row['candidate']:>12}"
+                  f"  {row['change_pct']:+7.1f}%{flag}")
+        for name in sorted(baseline.keys() ^ candidate.keys()):
+            print(f"{name:<24} only in {'baseline' if name in baseline else 'candidate'}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,122 @@
+"""
+Check that every supported filter/sort combination of the product listing
+is served by an index, using the database's own EXPLAIN.
+
+    python -m benchmarks.explain_filters --products 100000
+
+Combinations: owner (yes/no) x every subset of the price/created/updated
+ranges x every sort key in both directions x first page/cursor page. A plan
+fails when it reads the whole table (SQLite ``SCAN products``, Postgres
+``Seq Scan``) or sorts a whole-index scan. Filtered queries must also start
+with a range condition on an index (SQLite ``SEARCH``, Postgres
+``Index Cond``). Exits 1 when any combination fails.
+"""
+from datetime import datetime, timedelta
+from itertools import combinations, product
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+import argparse
+import re
+import sys
+
+from benchmarks.common import create_schema, report, use_benchmark_database
+
+RANGES = ("price", "created", "updated")
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def combination_queries():
+    """Yield (description, statement) for every supported combination."""
+    from sqlalchemy import select
+    from core.pagination import SORT_KEYS, encode_cursor
+    from core.serialization import PRODUCT_COLUMNS
+    from models.models import Product
+    from routers.products import filter_query, page_query
+
+    now = datetime(2024, 1, 1)
+    bounds = {
+        "price": {"min_price": 10.0, "max_price": 20.0},
+        "created": {"created_after": now - timedelta(days=7), "created_before": now},
+        "updated": {"updated_after": now - timedelta(days=7), "updated_before": now},
+    }
+    cursor_values = {"price": 15.0, "created_at": now, "updated_at": now}
+    some_id = "00000000-0000-7000-8000-000000000001"
+    subsets = [subset for size in range(len(RANGES) + 1) for subset in combinations(RANGES, size)]
+    sorts = [f"{sign}{key}" for key in SORT_KEYS for sign in ("", "-")]
+    for owner, ranges, sort, paged in product((False, True), subsets, sorts, (False, True)):
+        filters = {"user_id": some_id} if owner else {}
+        for name in ranges:
+            filters.update(bounds[name])
+        key = sort.lstrip("-")
+        cursor = encode_cursor(cursor_values[key], some_id, key) if paged else None
+        query = page_query(filter_query(select(Product), filters), Product, 100, cursor=cursor, sort=sort)
+        description = {"owner": owner, "ranges": list(ranges), "sort": sort, "cursor": paged}
+        yield description, query.with_only_columns(*PRODUCT_COLUMNS)
+
+
+def check_plan(dialect: str, plan: str, filtered: bool):
+    """Return None when ``plan`` is acceptable, else the reason it is not."""
+    if dialect == "sqlite":
+        if re.search(r"SCAN products\b(?! USING)", plan):
+            return "full table scan"
+        if "SCAN products USING" in plan and "TEMP B-TREE" in plan:
+            return "whole index scanned then sorted"
+        if filtered and "SEARCH products USING" not in plan:
+            return "no index range condition"
+    else:
+        if "Seq Scan on products" in plan:
+            return "full table scan"
+        if filtered and "Index Cond" not in plan:
+            return "no index range condition"
+    return None
+
+
+def explain_all(connection):
+    """EXPLAIN every combination on ``connection``; returns (checked, failures)."""
+    dialect = connection.dialect.name
+    checked, failures = 0, []
+    for description, query in combination_queries():
+        rows = connection.execute(Explain(query)).all()
+        plan = "\n".join(str(row[-1]) for row in rows)
+        filtered = description["owner"] or description["ranges"] or description["cursor"]
+        reason = check_plan(dialect, plan, bool(filtered))
+        checked += 1
+        if reason is not None:
+            failures.append({**description, "reason": reason, "plan": plan})
+    return checked, failures
+
+
+def main(args):
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    with engine.connect() as conn:
+        from sqlalchemy import func, select
+        from models.models import Product
+        existing = conn.scalar(select(func.count()).select_from(Product))
+    if not existing and args.products:
+        from benchmarks.seed import seed
+        seed(engine, max(1, args.products // 100), args.products)
+    with engine.connect() as conn:
+        checked, failures = explain_all(conn)
+    report([{"name": "explain_filters", "dialect": engine.dialect.name, "combinations": checked,
+             "failures": failures}])
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100000,
+                        help="rows to seed into an empty database, so the planner sees realistic statistics")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,196 @@
+"""
+Load scenarios against the ASGI app on a large synthetic dataset.
+
+    python -m benchmarks.scenarios --users 100000 --products 1000000 \\
+        --requests 2000 --concurrency 50 --output results.json
+
+Seeds the database with ``benchmarks.seed`` unless it already holds data
+(point DATABASE_URL at a seeded database to reuse it), then drives each
+scenario concurrently and reports throughput, p50/p95/p99 latency and status
+codes per endpoint as one JSON document. Compare two runs with
+``python -m benchmarks.compare old.json new.json``.
+"""
+from collections import Counter
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+
+from benchmarks.common import (
+    asgi_client, auth_headers, create_schema, drive, summarize, use_benchmark_database,
+)
+from benchmarks.seed import SEED_PASSWORD, WORDS, seed
+
+SCENARIOS = ["list_products", "list_products_cursor", "read_product", "search", "create_product", "login"]
+
+# Settings recorded with the results, since they change what is measured
+RECORDED_ENV = [
+    "PRODUCT_CACHE_BACKEND", "PRINCIPAL_CACHE_TTL", "HASH_EXECUTOR", "HASH_WORKERS",
+    "TRACING_ENABLED", "TRACE_DEBUG", "AUTH_RATE_LIMIT_ENABLED",
+]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def prepare_dataset(engine, users: int, products: int, seed_value: int) -> dict:
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        existing_users = conn.execute(text("SELECT count(*) FROM users")).scalar()
+        existing_products = conn.execute(text("SELECT count(*) FROM products")).scalar()
+    if existing_users:
+        return {"users": existing_users, "products": existing_products, "seeded": False}
+    manifest = seed(engine, users, products, seed_value)
+    return {"users": users, "products": products, "seeded": True, "load": manifest}
+
+
+def sample_rows(engine, table: str, columns: str, count: int):
+    # Seeded ids are random UUIDs, so the first ones by id are a spread-out
+    # sample; selected through the model columns so ids come back as strings
+    from sqlalchemy import select
+    from db.database import Base
+    table = Base.metadata.tables[table]
+    query = select(*[table.c[name.strip()] for name in columns.split(",")]).order_by(table.c.id).limit(count)
+    with engine.connect() as conn:
+        return conn.execute(query).all()
+
+
+async def run_scenarios(app, engine, args, dataset: dict):
+    rng = random.Random(args.seed)
+    users = [dict(row._mapping) for row in sample_rows(engine, "users", "id, name, email", args.sample)]
+    product_ids = [row.id for row in sample_rows(engine, "products", "id", args.sample)]
+    tokens = [auth_headers(user) for user in users]
+    max_skip = max(0, min(dataset["products"], args.max_skip) - 100)
+
+    async with asgi_client(app) as client:
+        cursors = []
+        statuses = Counter()
+
+        async def request(method, url, **kwargs):
+            response = await client.request(method, url, **kwargs)
+            statuses[response.status_code] += 1
+            return response
+
+        async def list_products(i):
+            await request("GET", f"/api/products/?skip={rng.randint(0, max_skip)}&limit=100",
+                          headers=rng.choice(tokens))
+
+        async def list_products_cursor(i):
+            # Walk forward from a remembered cursor, restarting from the first page
+            cursor = cursors.pop() if cursors and rng.random() < 0.9 else None
+            url = "/api/products/?limit=100" + (f"&cursor={cursor}" if cursor else "")
+            response = await request("GET", url, headers=rng.choice(tokens))
+            if "X-Next-Cursor" in response.headers:
+                cursors.append(response.headers["X-Next-Cursor"])
+
+        async def read_product(i):
+            await request("GET", f"/api/products/{rng.choice(product_ids)}", headers=rng.choice(tokens))
+
+        async def search(i):
+            # Seeded names are "<Word> <word> <n>": a word plus a number is a
+            # selective query, a lone word would match about a quarter of the rows
+            number = rng.randrange(max(1, dataset["products"]))
+            await request("GET", f"/api/products/search?q={rng.choice(WORDS)}+{number}",
+                          headers=rng.choice(tokens))
+
+        async def create_product(i):
+            await request("POST", "/api/products/", headers=rng.choice(tokens), json={
+                "name": f"Load product {i}", "description": "Created by the load scenario", "price": 9.99,
+            })
+
+        async def login(i):
+            await request("POST", "/api/auth/login",
+                          data={"username": rng.choice(users)["email"], "password": SEED_PASSWORD})
+
+        senders = {
+            "list_products": list_products,
+            "list_products_cursor": list_products_cursor,
+            "read_product": read_product,
+            "search": search,
+            "create_product": create_product,
+            "login": login,
+        }
+        results = []
+        for name in args.scenarios:
+            total = args.login_requests if name == "login" else args.requests
+            if args.warmup:
+                await drive(senders[name], min(args.warmup, total), args.concurrency)
+            statuses.clear()
+            latencies, elapsed = await drive(senders[name], total, args.concurrency)
+            results.append(summarize(
+                name, latencies, elapsed, concurrency=args.concurrency,
+                status_codes={str(code): count for code, count in sorted(statuses.items())},
+                errors=sum(count for code, count in statuses.items() if code >= 400),
+            ))
+    return results
+
+
+async def main(args):
+    # Every simulated client shares one address: the login scenario measures
+    # bcrypt throughput, not the per-IP limit, unless asked to. Set on the
+    # module too, since seeding may already have imported it
+    os.environ.setdefault("AUTH_RATE_LIMIT_ENABLED", "false")
+    from core import ratelimit
+    ratelimit.AUTH_RATE_LIMIT_ENABLED = os.environ["AUTH_RATE_LIMIT_ENABLED"].lower() == "true"
+
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    dataset = prepare_dataset(engine, args.users, args.products, args.seed)
+
+    from main import app
+    from core.hashing import hasher
+    try:
+        results = await run_scenarios(app, engine, args, dataset)
+    finally:
+        hasher.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dialect": engine.dialect.name,
+            "env": {name: os.environ[name] for name in RECORDED_ENV if name in os.environ},
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "dataset": dataset,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000, help="users to seed into an empty database")
+    parser.add_argument("--products", type=int, default=1000000, help="products to seed into an empty database")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=SCENARIOS,
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--login-requests", type=int, default=200, help="bcrypt bound, so fewer by default")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests before each scenario")
+    parser.add_argument("--sample", type=int, default=1000, help="users/products sampled as request targets")
+    parser.add_argument("--max-skip", type=int, default=10000, help="deepest offset used by list_products")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    document = json.dumps(asyncio.run(main(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(document + "\n")
+    else:
+        print(document)
@@ -0,0 +1,230 @@
+"""
+Bulk-load a reproducible synthetic dataset of users and products.
+
+    python -m benchmarks.seed --users 100000 --products 1000000
+
+Postgres is loaded with COPY ... FROM STDIN streamed from generated rows,
+SQLite with batched executemany in a single transaction; the full-text
+index is rebuilt once after the load rather than maintained per row. Rows come from a
+seeded RNG, so the same arguments always produce the same dataset. Every
+user shares one password (hashed once): see ``SEED_PASSWORD``.
+
+Prints a JSON manifest with the counts and load rates.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from uuid import UUID
+import argparse
+import io
+import json
+import random
+import time
+
+from benchmarks.common import create_schema, use_benchmark_database
+
+SEED_PASSWORD = "Bench1234!"
+SEED_EPOCH = datetime(2024, 1, 1)
+SEED_BATCH_SIZE = 10000
+
+USER_COLUMNS = ["id", "name", "email", "password", "is_active", "created_at", "updated_at"]
+PRODUCT_COLUMNS = ["id", "name", "description", "price", "user_id", "created_at", "updated_at"]
+
+WORDS = [
+    "alpha", "bravo", "cedar", "delta", "ember", "flint", "garnet", "harbor", "indigo", "jasper",
+    "kestrel", "lumen", "maple", "nova", "onyx", "pine", "quartz", "raven", "slate", "tundra",
+    "umber", "violet", "willow", "xenon", "yarrow", "zephyr",
+]
+
+
+def user_email(index: int) -> str:
+    return f"bench{index}@example.com"
+
+
+def _uuid(rng: random.Random) -> UUID:
+    # Random (uuid4) ids, like the rows created before ids were time-ordered
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def generate_users(count: int, password_hash: str, seed: int = 0):
+    rng = random.Random(f"users-{seed}")
+    for i in range(count):
+        created = SEED_EPOCH + timedelta(seconds=i)
+        yield (_uuid(rng), f"Bench User {i}", user_email(i), password_hash, True, created, created)
+
+
+def generate_products(count: int, user_ids, seed: int = 0):
+    rng = random.Random(f"products-{seed}")
+    for i in range(count):
+        # Spread over a year with increasing timestamps, like real inserts
+        created = SEED_EPOCH + timedelta(seconds=i * 31_536_000 // max(count, 1))
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}"
+        description = " ".join(rng.choices(WORDS, k=8))
+        yield (_uuid(rng), name, description, round(rng.uniform(1, 1000), 2),
+               user_ids[rng.randrange(len(user_ids))], created, created)
+
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _CopyStream(io.RawIOBase):
+    """File-like object feeding generated rows to COPY as CSV, without materializing them."""
+
+    def __init__(self, rows):
+        self._lines = (self._line(row) for row in rows)
+        self._pending = b""
+
+    @staticmethod
+    def _line(row) -> bytes:
+        fields = []
+        for value in row:
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, bool):
+                value = "t" if value else "f"
+            value = str(value)
+            if any(c in value for c in ',"\n'):
+                value = '"' + value.replace('"', '""') + '"'
+            fields.append(value)
+        return (",".join(fields) + "\n").encode()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._pending += line
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def _copy(engine, table: str, columns, rows):
+    # psycopg2 raw connection: COPY streams the rows in one round trip
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", _CopyStream(rows)
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def _sqlite_value(value):
+    # Same text format SQLAlchemy's SQLite DateTime writes, so comparisons
+    # against values it binds (keyset pagination) stay consistent; ids as
+    # the 16 bytes CompactUUID stores
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, UUID):
+        return value.bytes
+    return value
+
+
+def _sqlite_row(row):
+    return tuple(_sqlite_value(value) for value in row)
+
+
+def _executemany(engine, table: str, columns, rows, batch_size: int):
+    rows = (_sqlite_row(row) for row in rows)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        # Bulk load only: durability does not matter for a throwaway dataset
+        cursor.execute("PRAGMA synchronous = OFF")
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        for batch in _batches(rows, batch_size):
+            cursor.executemany(sql, batch)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def load(engine, table: str, columns, rows, batch_size: int = SEED_BATCH_SIZE):
+    if engine.dialect.name == "postgresql":
+        _copy(engine, table, columns, rows)
+    else:
+        _executemany(engine, table, columns, rows, batch_size)
+
+
+@contextmanager
+def deferred_search_index(engine):
+    """
+    Drop the full-text index for the load and rebuild it once at the end,
+    instead of maintaining it row by row (triggers on SQLite, GIN on Postgres).
+    """
+    from db.search import drop_search_index, ensure_search_index
+    with engine.begin() as conn:
+        drop_search_index(conn)
+    yield
+    with engine.begin() as conn:
+        ensure_search_index(conn)
+
+
+def seed(engine, users: int, products: int, seed: int = 0, batch_size: int = SEED_BATCH_SIZE) -> dict:
+    from routers.auth import pwd_context
+    password_hash = pwd_context.hash(SEED_PASSWORD)
+    manifest = {"dialect": engine.dialect.name, "seed": seed, "password": SEED_PASSWORD}
+
+    start = time.perf_counter()
+    user_ids = []
+
+    def users_rows():
+        for row in generate_users(users, password_hash, seed):
+            user_ids.append(row[0])
+            yield row
+
+    load(engine, "users", USER_COLUMNS, users_rows(), batch_size)
+    elapsed = time.perf_counter() - start
+    manifest["users"] = {"rows": users, "elapsed_s": round(elapsed, 3),
+                         "rows_per_s": round(users / elapsed, 1) if elapsed else 0.0}
+
+    start = time.perf_counter()
+    if products:
+        with deferred_search_index(engine):
+            load(engine, "products", PRODUCT_COLUMNS, generate_products(products, user_ids, seed), batch_size)
+    elapsed = time.perf_counter() - start
+    manifest["products"] = {"rows": products, "elapsed_s": round(elapsed, 3),
+                            "rows_per_s": round(products / elapsed, 1) if elapsed else 0.0}
+
+    # Fresh statistics so the planner sees the real table sizes
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().execute("ANALYZE")
+        raw.commit()
+    finally:
+        raw.close()
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE)
+    args = parser.parse_args()
+    if args.users < 1:
+        parser.error("--users must be at least 1 (products need an owner)")
+
+    url = use_benchmark_database()
+    engine = create_schema(url)
+    manifest = seed(engine, args.users, args.products, args.seed, args.batch_size)
+    manifest["database_url"] = engine.url.render_as_string(hide_password=True)
+    print(json.dumps(manifest, indent=2))
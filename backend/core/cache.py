@@ -0,0 +1,255 @@
+"""
+Caches: small in-process TTL/LRU caches and the pluggable response cache.
+"""
+from collections import OrderedDict
+import json
+import threading
+import time
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``version()``/``set(..., version=...)`` guard against a reader storing a
+    value it loaded before a concurrent ``invalidate()``: the write is dropped
+    if any invalidation happened in between.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def version(self) -> int:
+        return self._version
+
+    def set(self, key, value, version: int = None):
+        with self._lock:
+            if version is not None and version != self._version:
+                return False
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class NullBackend:
+    """Caching disabled."""
+    name = "none"
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value):
+        pass
+
+    async def delete(self, *keys):
+        pass
+
+    async def generation(self, name) -> int:
+        return 0
+
+    async def bump(self, *names):
+        pass
+
+    async def clear(self):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend:
+    """In-process LRU, the default."""
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def set(self, key, value):
+        self._cache.set(key, value)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._cache.invalidate(key)
+
+    async def generation(self, name) -> int:
+        return self._generations.get(name, 0)
+
+    async def bump(self, *names):
+        for name in names:
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+    async def clear(self):
+        self._cache.clear()
+        self._generations.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        return {key: stats[key] for key in ("size", "maxsize", "ttl_seconds", "evictions")}
+
+
+class RedisBackend:
+    """Redis (or any Redis-compatible server), shared by every worker. Needs the ``redis`` package."""
+    name = "redis"
+
+    def __init__(self, url: str, ttl: float, prefix: str = "cache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("The redis cache backend requires the 'redis' package")
+        self._redis = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key):
+        return await self._redis.get(self.prefix + key)
+
+    async def set(self, key, value):
+        await self._redis.set(self.prefix + key, value, ex=max(1, int(self.ttl)))
+
+    async def delete(self, *keys):
+        if keys:
+            await self._redis.delete(*[self.prefix + key for key in keys])
+
+    async def generation(self, name) -> int:
+        return int(await self._redis.get(f"{self.prefix}gen:{name}") or 0)
+
+    async def bump(self, *names):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.incr(f"{self.prefix}gen:{name}")
+            await pipe.execute()
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+    def stats(self) -> dict:
+        # Server-side evictions are in Redis' own INFO stats
+        return {"ttl_seconds": self.ttl}
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized responses (headers + JSON body).
+
+    Writers call ``invalidate()`` after their commit: it deletes exact keys
+    and bumps named generations that readers embed in keys of derived
+    results (list pages), orphaning every page at once. A reader takes a
+    ``token()`` before going to the database and its ``set()`` is dropped if
+    any invalidation happened in between, so a read racing a write can never
+    store the pre-write result.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, key):
+        entry = await self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        meta, body = entry.split(b"\n", 1)
+        return json.loads(meta), body
+
+    def token(self) -> int:
+        return self._epoch
+
+    async def set(self, key, headers: dict, body: bytes, token: int) -> bool:
+        if token != self._epoch:
+            return False
+        await self.backend.set(key, json.dumps(headers).encode() + b"\n" + body)
+        return True
+
+    async def generation(self, name: str) -> int:
+        return await self.backend.generation(name)
+
+    async def invalidate(self, keys=(), generations=()):
+        self._epoch += 1
+        self.invalidations += 1
+        await self.backend.delete(*keys)
+        await self.backend.bump(*generations)
+
+    async def clear(self):
+        self._epoch += 1
+        await self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            **self.backend.stats(),
+        }
+
+
+def create_response_cache(backend: str, maxsize: int = 10000, ttl: float = 300, redis_url: str = None) -> ResponseCache:
+    if backend == "redis":
+        return ResponseCache(RedisBackend(redis_url, ttl))
+    if backend == "none":
+        return ResponseCache(NullBackend())
+    return ResponseCache(MemoryBackend(maxsize, ttl))
@@ -0,0 +1,83 @@
+"""
+Conditional GET helpers (ETag / Last-Modified validators and 304 responses).
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+import hashlib
+
+# Clients may keep a copy but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Stored timestamps are naive UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime = None) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are present (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: proxies that transform the body (gzip) send W/"..."
+        tags = [_opaque_tag(tag) for tag in if_none_match.split(",")]
+        return "*" in tags or _opaque_tag(etag) in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one second resolution
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def validator_headers(etag: str, last_modified: datetime = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: datetime = None, extra_headers: dict = None) -> Response:
+    headers = validator_headers(etag, last_modified)
+    headers.update(extra_headers or {})
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def item_validators(id: str, updated_at: datetime, variant=None):
+    # Strong validator for one row: it changes whenever the row is updated.
+    # ``variant`` tells apart other representations (e.g. a sparse fieldset)
+    if variant is not None:
+        return make_etag(id, updated_at.isoformat(), variant), updated_at
+    return make_etag(id, updated_at.isoformat()), updated_at
+
+
+def page_validators(rows, next_cursor: str = None, variant=None):
+    """
+    Validators for a list page, from the (id, updated_at) of its rows.
+
+    Any insert, update or delete that changes what the page shows changes
+    this version, without a global counter shared between workers.
+    ``variant`` identifies the representation (fields, filters, sort).
+    """
+    etag = make_etag([(row.id, row.updated_at.isoformat()) for row in rows], next_cursor, variant)
+    last_modified = max((row.updated_at for row in rows), default=None)
+    return etag, last_modified
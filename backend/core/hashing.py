@@ -0,0 +1,164 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (~200 ms of CPU per call), so the auth paths hand
+it to a bounded worker pool instead of running it inside async handlers.
+The pool is a process pool by default so hashing scales across cores.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import os
+import time
+
+from core.metrics import password_hash_duration, password_hash_rejected, password_hash_wait
+from core.tracing import span
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Pool settings
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", os.cpu_count() or 1))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 64))
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "process")  # "process" or "thread"
+
+
+# Password utils (blocking, these run inside the pool workers)
+def verify_password(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+def get_password_hash(password):
+    return pwd_context.hash(password)
+
+
+# Metric label per blocking helper
+HASH_OPERATIONS = {
+    verify_password: "verify",
+    get_password_hash: "hash",
+}
+
+
+class HashingQueueFull(Exception):
+    """Raised when the hashing pool already has its queue limit of jobs waiting."""
+
+
+def _timed_call(fn, args):
+    # Runs in the worker: report when the job actually started so the
+    # caller can tell queue wait apart from hashing time
+    started = time.time()
+    result = fn(*args)
+    return started, time.time() - started, result
+
+
+class HashingExecutor:
+    def __init__(self, max_workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT,
+                 kind: str = HASH_EXECUTOR):
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = max(0, queue_limit)
+        self.kind = kind
+        self._executor: Executor = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._hash_total = 0.0
+        self._restarts = 0
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing this module never spawns processes
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="hashing")
+            else:
+                # spawn rather than fork: the parent has event loop and DB driver threads
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+        return self._executor
+
+    def _replace_broken(self, executor: Executor):
+        # A worker died (OOM kill, segfault) and took the pool with it. Only
+        # the first of the jobs that saw it break drops the pool; the next
+        # _get_executor starts a fresh one
+        if self._executor is executor:
+            self._executor = None
+            self._restarts += 1
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, loop, fn, args):
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, _timed_call, fn, args)
+        except BrokenProcessPool:
+            self._replace_broken(executor)
+            raise
+
+    @property
+    def queue_depth(self) -> int:
+        # Jobs submitted but not yet picked up by a worker
+        return max(0, self._in_flight - self.max_workers)
+
+    def check_capacity(self):
+        # Every worker busy and the queue full: shed load instead of queueing forever
+        if self._in_flight >= self.max_workers + self.queue_limit:
+            self._rejected += 1
+            password_hash_rejected.inc()
+            raise HashingQueueFull()
+
+    async def run(self, fn, *args):
+        self.check_capacity()
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        self._in_flight += 1
+        try:
+            try:
+                started, elapsed, result = await self._submit(loop, fn, args)
+            except BrokenProcessPool:
+                # Hashing has no side effects: retry once on a new pool
+                started, elapsed, result = await self._submit(loop, fn, args)
+        finally:
+            self._in_flight -= 1
+        wait = max(0.0, started - submitted)
+        self._completed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._hash_total += elapsed
+        password_hash_wait.observe(wait)
+        password_hash_duration.observe(elapsed, HASH_OPERATIONS.get(fn, fn.__name__))
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.max_workers,
+            "queue_limit": self.queue_limit,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "wait_avg_ms": round(self._wait_total / self._completed * 1000, 3) if self._completed else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 3),
+            "hash_avg_ms": round(self._hash_total / self._completed * 1000, 3) if self._completed else 0.0,
+            "restarts": self._restarts,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Shared pool used by the auth paths
+hasher = HashingExecutor()
+
+# Awaitable API
+async def verify_password_async(plain_password, hashed_password):
+    with span("hash"):
+        return await hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    with span("hash"):
+        return await hasher.run(get_password_hash, password)
@@ -0,0 +1,137 @@
+"""
+Background health sampling.
+
+System metrics and a database ping are sampled every few seconds by a
+background task into a ring buffer, so health endpoints only read the
+latest sample instead of doing blocking work on the event loop per probe.
+
+psutil and platform are only imported once the sampler runs or the platform
+facts are read, keeping them out of the app's import time.
+"""
+from collections import deque
+from datetime import datetime
+from functools import cached_property
+from sqlalchemy import text
+import asyncio
+import os
+import time
+
+HEALTH_SAMPLE_INTERVAL = float(os.getenv("HEALTH_SAMPLE_INTERVAL", 5))
+HEALTH_HISTORY_SIZE = int(os.getenv("HEALTH_HISTORY_SIZE", 60))
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", 2))
+
+
+class HealthSampler:
+    def __init__(self, engine, interval: float = HEALTH_SAMPLE_INTERVAL,
+                 history_size: int = HEALTH_HISTORY_SIZE, db_timeout: float = HEALTH_DB_TIMEOUT):
+        self.engine = engine
+        self.interval = interval
+        self.db_timeout = db_timeout
+        self.samples = deque(maxlen=history_size)
+        self.started_at = datetime.utcnow()
+        self._started = time.monotonic()
+        self._task = None
+        self._stopping = False
+
+    @cached_property
+    def platform(self) -> dict:
+        # Static facts, collected once
+        import platform
+        return {
+            "os": platform.system(),
+            "os_version": platform.version(),
+            "python_version": platform.python_version(),
+            "hostname": platform.node(),
+            "cpu_count": os.cpu_count(),
+        }
+
+    @property
+    def uptime_seconds(self) -> float:
+        return round(time.monotonic() - self._started, 1)
+
+    def _system_sample(self) -> dict:
+        # cpu_percent(interval=None) compares with the previous call instead of sleeping
+        import psutil
+        memory = psutil.virtual_memory()
+        return {
+            "cpu_usage": psutil.cpu_percent(interval=None),
+            "memory_total": round(memory.total / (1024 * 1024), 2),  # MB
+            "memory_available": round(memory.available / (1024 * 1024), 2),  # MB
+            "memory_used_percent": memory.percent,
+            "disk_usage": psutil.disk_usage('/').percent,
+        }
+
+    async def _select_one(self):
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _ping_database(self) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._select_one(), self.db_timeout)
+        except Exception as e:
+            return {"status": "unhealthy", "error": str(e) or type(e).__name__,
+                    "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+        return {"status": "healthy", "error": None,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def sample(self) -> dict:
+        system = await asyncio.to_thread(self._system_sample)
+        database = await self._ping_database()
+        sample = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "monotonic": time.monotonic(),
+            "database": database,
+            "system": system,
+        }
+        self.samples.append(sample)
+        return sample
+
+    def _prime(self):
+        import psutil
+        psutil.cpu_percent(interval=None)  # prime the CPU counter
+
+    async def _run(self):
+        # Off the event loop, so the worker starts serving without waiting on psutil
+        await asyncio.to_thread(self._prime)
+        while not self._stopping:
+            try:
+                await self.sample()
+            except Exception:
+                # Never let a bad sample kill the sampler
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            # wait_for (used for the DB ping) can swallow a cancellation that
+            # races with its inner call finishing, so keep cancelling until done
+            while not self._task.done():
+                self._task.cancel()
+                await asyncio.wait({self._task}, timeout=0.1)
+            self._task = None
+
+    def latest(self):
+        return self.samples[-1] if self.samples else None
+
+    def is_fresh(self, sample) -> bool:
+        # A sample older than a few intervals means the sampler is stuck
+        return time.monotonic() - sample["monotonic"] <= self.interval * 3
+
+    def history(self, count: int = 10):
+        return [
+            {
+                "timestamp": sample["timestamp"],
+                "database": sample["database"]["status"],
+                "database_latency_ms": sample["database"]["latency_ms"],
+                "cpu_usage": sample["system"]["cpu_usage"],
+                "memory_used_percent": sample["system"]["memory_used_percent"],
+            }
+            for sample in list(self.samples)[-count:]
+        ]
@@ -0,0 +1,55 @@
+"""
+Time-ordered identifiers (UUIDv7, RFC 9562).
+
+A UUIDv7 starts with the 48-bit Unix time in milliseconds, so ids created
+one after the other are close in the primary key and foreign key indexes:
+inserts append to the right-most index pages instead of landing on a random
+page each, as uuid4 ids do. Ids created in the same millisecond are ordered
+by a 12-bit counter, so they stay unique and sortable within a process.
+
+Ids travel through the API as canonical strings; ids issued before v7 (any
+uuid4) remain valid.
+"""
+from uuid import UUID
+import os
+import threading
+import time
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+_COUNTER_MAX = 0xFFF
+
+
+def uuid7() -> UUID:
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            # Random start in the lower half leaves room to count up
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            # Same millisecond (or the clock went back): keep counting
+            ms = _last_ms
+            _counter += 1
+            if _counter > _COUNTER_MAX:
+                ms += 1
+                _counter = 0
+        _last_ms = ms
+        counter = _counter
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b)
+
+
+def new_id() -> str:
+    """A new time-ordered id in the API's string form."""
+    return str(uuid7())
+
+
+def parse_id(value) -> str:
+    """Canonical string form of ``value``, or None when it is not a UUID."""
+    try:
+        return str(value if isinstance(value, UUID) else UUID(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
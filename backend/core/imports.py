@@ -0,0 +1,242 @@
+"""
+Streaming product import from NDJSON or CSV request bodies.
+
+The body is parsed chunk by chunk as it arrives, rows are validated against
+ProductCreate a batch at a time and every batch is inserted and committed on
+its own, so memory stays bounded by the batch size whatever the upload size.
+Jobs are tracked in-process so their progress can be polled while they run.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
+from typing import List
+from uuid import uuid4
+import codecs
+import csv
+import json
+import os
+import time
+
+from core.ids import new_id
+from models.models import Product
+from schemas.schemas import ProductCreate
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+# Per-row errors kept on a job; further errors are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+# Finished jobs kept around for progress queries
+IMPORT_MAX_JOBS = int(os.getenv("IMPORT_MAX_JOBS", 100))
+# Longest line (or CSV record) buffered while waiting for its end
+IMPORT_MAX_LINE_LENGTH = int(os.getenv("IMPORT_MAX_LINE_LENGTH", 1024 * 1024))
+
+_batch_adapter = TypeAdapter(List[ProductCreate])
+
+
+class ImportJob:
+    def __init__(self, user_id: str, format: str):
+        self.id = str(uuid4())
+        self.user_id = user_id
+        self.format = format
+        self.status = "running"
+        self.rows_processed = 0
+        self.rows_imported = 0
+        self.rows_failed = 0
+        self.errors = []
+        self.error = None
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self._started = time.perf_counter()
+        self._elapsed = None
+
+    def add_error(self, row: int, detail):
+        self.rows_failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "detail": detail})
+
+    def finish(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        self._elapsed = time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._started
+        return {
+            "id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "rows_processed": self.rows_processed,
+            "rows_imported": self.rows_imported,
+            "rows_failed": self.rows_failed,
+            "rows_per_second": round(self.rows_processed / elapsed, 1) if elapsed else 0.0,
+            "errors": self.errors,
+            "errors_truncated": self.rows_failed > len(self.errors),
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ImportRegistry:
+    def __init__(self, max_jobs: int = IMPORT_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+
+    def create(self, user_id: str, format: str) -> ImportJob:
+        job = ImportJob(user_id, format)
+        self._jobs[job.id] = job
+        # Forget the oldest finished jobs, never a running one
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status != "running":
+                del self._jobs[job_id]
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def for_user(self, user_id: str):
+        return [job for job in self._jobs.values() if job.user_id == user_id]
+
+
+imports = ImportRegistry()
+
+
+async def _lines(chunks):
+    # Decode the byte stream incrementally and yield complete lines
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+        if len(pending) > IMPORT_MAX_LINE_LENGTH:
+            raise ValueError("Line too long")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+class ParseError(str):
+    """Yielded by the record parsers in place of a record that could not be parsed."""
+
+
+async def ndjson_records(chunks):
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ParseError(f"Invalid JSON: {e}")
+
+
+async def csv_records(chunks):
+    # A CSV record may span lines when a quoted field holds a newline:
+    # keep joining lines until the record's quotes are balanced
+    header = None
+    record = ""
+    async for line in _lines(chunks):
+        record += line
+        if record.count('"') % 2:
+            if len(record) > IMPORT_MAX_LINE_LENGTH:
+                raise ValueError("CSV record too long")
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            yield ParseError(f"Invalid CSV: {e}")
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield dict(zip(header, values))
+    if record.strip():
+        yield ParseError("Invalid CSV: unterminated quoted field")
+
+
+RECORD_PARSERS = {
+    "ndjson": ndjson_records,
+    "csv": csv_records,
+}
+
+
+def _validate_batch(batch):
+    # Fast path validates the whole batch at once; on failure fall back
+    # to row-by-row to attribute errors
+    try:
+        return _batch_adapter.validate_python([record for _, record in batch]), []
+    except ValidationError:
+        pass
+    valid, errors = [], []
+    for row, record in batch:
+        if isinstance(record, ParseError):
+            errors.append((row, str(record)))
+            continue
+        try:
+            valid.append(ProductCreate.model_validate(record))
+        except ValidationError as e:
+            errors.append((row, e.errors(include_url=False, include_context=False, include_input=False)))
+    return valid, errors
+
+
+async def _insert_batch(db, job: ImportJob, batch, on_commit=None):
+    valid, errors = _validate_batch(batch)
+    for row, detail in errors:
+        job.add_error(row, detail)
+    if valid:
+        now = datetime.utcnow()
+        await db.execute(insert(Product), [
+            {
+                "id": new_id(),
+                "name": product.name,
+                "description": product.description,
+                "price": product.price,
+                "user_id": job.user_id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for product in valid
+        ])
+        # One transaction per batch: a late failure keeps earlier batches
+        await db.commit()
+        if on_commit is not None:
+            await on_commit()
+    job.rows_imported += len(valid)
+    job.rows_processed += len(batch)
+
+
+async def _enumerate(records):
+    row = 0
+    async for record in records:
+        row += 1
+        yield row, record
+
+
+async def run_import(db, job: ImportJob, chunks, on_commit=None):
+    """
+    Import every record of the ``chunks`` byte stream into ``job``.
+    ``on_commit`` is awaited after every committed batch.
+    """
+    batch = []
+    try:
+        async for row, record in _enumerate(RECORD_PARSERS[job.format](chunks)):
+            # Unparsable records go through the batch too so errors stay in row order
+            batch.append((row, record))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await _insert_batch(db, job, batch, on_commit)
+                batch = []
+        if batch:
+            await _insert_batch(db, job, batch, on_commit)
+    except Exception as e:
+        await db.rollback()
+        job.finish("failed", str(e))
+        raise
+    job.finish("completed")
+    return job
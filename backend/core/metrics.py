@@ -0,0 +1,256 @@
+"""
+Minimal Prometheus-style metrics.
+
+Counters and histograms are plain dicts keyed by label values and updated
+without locks (single event loop), gauges are read from callbacks at scrape
+time. ``render()`` produces the Prometheus text exposition format.
+"""
+from bisect import bisect_left
+import time
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        for labelvalues, value in self._values.items():
+            yield self.name, _labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+
+    def observe(self, value: float, *labelvalues):
+        series = self._values.get(labelvalues)
+        if series is None:
+            series = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labelvalues) -> int:
+        series = self._values.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        for labelvalues, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       _labels(self.labelnames, labelvalues, f'le="{_number(bound)}"'), cumulative)
+            yield f"{self.name}_sum", _labels(self.labelnames, labelvalues), series[-1]
+            yield f"{self.name}_count", _labels(self.labelnames, labelvalues), cumulative
+
+
+class Gauge:
+    """Gauge whose samples come from ``callback() -> {labelvalues tuple: value}``."""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, callback, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        for labelvalues, value in self.callback().items():
+            yield self.name, _labels(self.labelnames, labelvalues), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, callback, labelnames=()):
+        return self.register(Gauge(name, help, callback, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # A broken gauge callback must not break the scrape
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# HTTP
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"))
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+
+# Database
+db_statements = registry.counter(
+    "db_statements_total", "SQL statements executed, by operation", ("operation",))
+db_statement_duration = registry.histogram(
+    "db_statement_duration_seconds", "SQL statement execution time, by operation", ("operation",))
+db_pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection, by engine", ("engine",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+
+# Password hashing
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "Time spent in bcrypt per hash/verify call", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0))
+password_hash_wait = registry.histogram(
+    "password_hash_queue_wait_seconds", "Time hash jobs waited for a free worker")
+password_hash_rejected = registry.counter(
+    "password_hash_rejected_total", "Hash jobs shed because the hashing pool was saturated")
+
+# Auth throttling
+auth_rate_limited = registry.counter(
+    "auth_rate_limited_total", "Auth attempts rejected by the rate limiter, by endpoint and key", ("endpoint", "scope"))
+
+
+# Group commit
+write_batch_size = registry.histogram(
+    "product_write_batch_size", "Rows written per group commit",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request.
+
+    Requests are labelled with the route template (``/api/products/{product_id}``)
+    rather than the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - start, method, path)
+            http_requests.inc(method, path, str(status_code))
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+# label -> sync engine, for the pool usage gauge
+_engines = {}
+
+
+def _pool_usage():
+    usage = {}
+    for label, sync_engine in _engines.items():
+        pool = sync_engine.pool
+        for state in ("size", "checkedout", "checkedin", "overflow"):
+            method = getattr(pool, state, None)
+            if method is not None:
+                usage[(label, state)] = method()
+    return usage
+
+
+registry.gauge("db_pool_connections", "Connection pool usage, by engine", _pool_usage, ("engine", "state"))
+
+
+def instrument_engine(engine, label: str = "primary"):
+    """Count and time every statement run on ``engine`` (sync or async)."""
+    from sqlalchemy import event
+    sync_engine = getattr(engine, "sync_engine", engine)
+    _engines[label] = sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_start"].pop()
+        operation = _operation(statement)
+        db_statements.inc(operation)
+        db_statement_duration.observe(time.perf_counter() - started, operation)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # Keep the start-time stack balanced when a statement fails
+        starts = context.connection.info.get("metrics_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def instrument_stats(name: str, help: str, stats):
+    """Expose the numeric fields of a ``stats()`` dict (caches, pools...) as a gauge."""
+    def collect():
+        return {(key,): value for key, value in stats().items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)}
+    registry.gauge(name, help, collect, ("field",))
@@ -0,0 +1,96 @@
+"""
+Keyset (cursor) pagination over ``(<sort key>, id)``.
+
+The cursor is an opaque url-safe token holding the sort key of the last row
+of the previous page, so the next page is an index range scan that starts
+right after it instead of an OFFSET that re-reads every skipped row. Each
+sort key is backed by a composite ``(<key>, id)`` index (and a
+``(user_id, <key>, id)`` one for per-owner listings), scanned backwards for
+descending sorts.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+from core.ids import parse_id
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Sortable columns and how their cursor values are parsed back
+SORT_KEYS = {
+    "created_at": datetime.fromisoformat,
+    "updated_at": datetime.fromisoformat,
+    "price": float,
+}
+DEFAULT_SORT = "created_at"
+# Whitelist for the ``sort`` query parameter; "-" means descending
+SORT_PATTERN = "^-?(" + "|".join(SORT_KEYS) + ")$"
+
+
+def parse_sort(sort: str):
+    # "-price" -> ("price", True)
+    return sort.lstrip("-"), sort.startswith("-")
+
+
+def _invalid_cursor():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+
+def encode_cursor(value, id: str, key: str = DEFAULT_SORT) -> str:
+    value = value.isoformat() if isinstance(value, datetime) else repr(value)
+    raw = f"{key}|{value}|{id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str = DEFAULT_SORT):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = urlsafe_b64decode(padded.encode()).decode().split("|", 2)
+        if len(parts) == 2:
+            # Cursors issued before sort keys existed were "<created_at>|<id>"
+            parts.insert(0, "created_at")
+        cursor_key, value, id = parts
+        id = parse_id(id)
+        if cursor_key != key or id is None:
+            # A cursor only makes sense for the sort it was issued for
+            raise _invalid_cursor()
+        return SORT_KEYS[key](value), id
+    except (ValueError, UnicodeDecodeError, KeyError):
+        raise _invalid_cursor()
+
+
+def page_query(query, model, limit: int, skip: int = 0, cursor: str = None, sort: str = DEFAULT_SORT):
+    """
+    Order ``query`` by ``(sort key, id)`` and restrict it to one page.
+
+    With a cursor the page starts after it (keyset mode), otherwise ``skip``
+    rows are skipped (offset mode). One extra row is fetched so
+    ``split_page`` can tell whether there is a next page.
+    """
+    key, descending = parse_sort(sort)
+    column = getattr(model, key)
+    if descending:
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        query = query.order_by(column, model.id)
+    if cursor is not None:
+        position = tuple_(column, model.id)
+        after = decode_cursor(cursor, key)
+        query = query.filter(position < after if descending else position > after)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def split_page(rows, limit: int, sort: str = DEFAULT_SORT):
+    # Drop the look-ahead row; return the page and the cursor of the next one
+    if len(rows) > limit:
+        rows = rows[:limit]
+        key, _ = parse_sort(sort)
+        return rows, encode_cursor(getattr(rows[-1], key), rows[-1].id, key)
+    return rows, None
@@ -0,0 +1,117 @@
+"""
+In-memory token-bucket rate limiting for the bcrypt-heavy auth endpoints.
+
+Each key (client IP, account email) gets a bucket of ``burst`` tokens that
+refills at ``rate`` tokens per second; a request spends one token or is
+rejected with the time until the next one. Buckets live in an LRU bounded by
+``maxsize`` keys, so a flood of distinct IPs or emails cannot grow memory:
+the least recently seen buckets are dropped (a dropped bucket starts full
+again, which only matters for keys idle long enough to be that old).
+
+State is per process; with several workers the effective limit is up to
+``workers`` times the configured one.
+"""
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+import math
+import os
+import time
+
+from core.hashing import hasher
+from core.metrics import auth_rate_limited
+
+AUTH_RATE_LIMIT_ENABLED = os.getenv("AUTH_RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Per client IP: sustained attempts per minute and burst size
+AUTH_IP_PER_MINUTE = float(os.getenv("AUTH_IP_PER_MINUTE", 20))
+AUTH_IP_BURST = int(os.getenv("AUTH_IP_BURST", 20))
+# Per account email, whatever the IP (guessing one account's password)
+AUTH_EMAIL_PER_MINUTE = float(os.getenv("AUTH_EMAIL_PER_MINUTE", 5))
+AUTH_EMAIL_BURST = int(os.getenv("AUTH_EMAIL_BURST", 5))
+# Buckets kept per limiter
+AUTH_LIMITER_MAX_KEYS = int(os.getenv("AUTH_LIMITER_MAX_KEYS", 100000))
+
+
+class RateLimiter:
+    """Token buckets per key, bounded LRU. Only used from the event loop."""
+
+    def __init__(self, rate: float, burst: int, maxsize: int = AUTH_LIMITER_MAX_KEYS, clock=time.monotonic):
+        self.rate = rate  # tokens per second
+        self.burst = max(1, burst)
+        self.maxsize = maxsize
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def acquire(self, key) -> float:
+        """Spend a token for ``key``; returns 0 if allowed, else seconds until one is available."""
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate if self.rate > 0 else math.inf
+            self.rejected += 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return wait
+
+    def clear(self):
+        self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._buckets),
+            "maxsize": self.maxsize,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+
+ip_limiter = RateLimiter(AUTH_IP_PER_MINUTE / 60, AUTH_IP_BURST)
+email_limiter = RateLimiter(AUTH_EMAIL_PER_MINUTE / 60, AUTH_EMAIL_BURST)
+
+
+def _too_many_requests(wait: float):
+    retry_after = "60" if math.isinf(wait) else str(max(1, math.ceil(wait)))
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts, please retry later",
+        headers={"Retry-After": retry_after},
+    )
+
+
+def throttle_auth(request: Request, email: str, endpoint: str):
+    """
+    Reject an auth attempt before any database or bcrypt work: 429 when the
+    client IP or the email is over its rate, 503 (HashingQueueFull) when the
+    hashing pool is already saturated.
+    """
+    if AUTH_RATE_LIMIT_ENABLED:
+        client = request.client.host if request.client else "unknown"
+        wait = ip_limiter.acquire(client)
+        if wait:
+            auth_rate_limited.inc(endpoint, "ip")
+            raise _too_many_requests(wait)
+        wait = email_limiter.acquire(email.strip().lower())
+        if wait:
+            auth_rate_limited.inc(endpoint, "email")
+            raise _too_many_requests(wait)
+    hasher.check_capacity()
+
+
+def stats() -> dict:
+    return {
+        **{f"ip_{key}": value for key, value in ip_limiter.stats().items()},
+        **{f"email_{key}": value for key, value in email_limiter.stats().items()},
+    }
@@ -0,0 +1,116 @@
+"""
+Fast JSON encoding for rows read straight from the database.
+
+Product reads select only the response columns as plain rows and encode them
+with orjson (the stdlib json module when orjson is not installed), skipping
+the ProductResponse validation pass: the data comes from our own tables, so
+re-validating every field of every row only costs CPU. Setting
+FAST_SERIALIZATION=false restores the validated path.
+
+Sparse fieldsets (``fields=name,price``) narrow both the SELECT and the
+payload to the requested ProductResponse fields. Listings default to
+LIST_FIELDS, which leaves out the unbounded ``description``.
+"""
+from datetime import datetime
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from functools import lru_cache
+from operator import itemgetter
+from pydantic import ConfigDict, create_model
+import json
+import os
+
+from models.models import Product
+from schemas.schemas import ProductResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "true").lower() == "true"
+
+# Response fields, in the order ProductResponse emits them
+PRODUCT_FIELDS = tuple(ProductResponse.model_fields)
+PRODUCT_COLUMNS = tuple(Product.__table__.c[name] for name in PRODUCT_FIELDS)
+# Default projection of list endpoints
+LIST_FIELDS = tuple(name for name in PRODUCT_FIELDS if name != "description")
+
+
+def parse_fields(fields: str = None, default: tuple = PRODUCT_FIELDS) -> tuple:
+    """``"price,name"`` -> the requested fields in response order, or ``default``."""
+    if fields is None:
+        return default
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(PRODUCT_FIELDS)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "No fields requested",
+        )
+    return tuple(name for name in PRODUCT_FIELDS if name in requested)
+
+
+def field_columns(fields: tuple, *required: str) -> tuple:
+    """Columns to select for ``fields`` plus the ones the handler needs itself."""
+    names = set(fields).union(required)
+    return tuple(column for column in PRODUCT_COLUMNS if column.name in names)
+
+
+@lru_cache(maxsize=None)
+def response_model(fields: tuple):
+    """ProductResponse, or a model with only ``fields`` for the validated path."""
+    if fields == PRODUCT_FIELDS:
+        return ProductResponse
+    return create_model(
+        "ProductFields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (ProductResponse.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _projection(row_fields: tuple, fields: tuple):
+    # Picks ``fields`` out of a row, as a tuple, by position
+    if fields == row_fields:
+        return tuple
+    if len(fields) == 1:
+        position = row_fields.index(fields[0])
+        return lambda row: (row[position],)
+    return itemgetter(*[row_fields.index(name) for name in fields])
+
+
+def encode_rows(rows, fields: tuple = None) -> bytes:
+    """
+    Encode result rows as a JSON array of objects keyed by column name,
+    keeping only ``fields`` when given.
+    """
+    if not rows:
+        return b"[]"
+    row_fields = rows[0]._fields
+    fields = tuple(fields or row_fields)
+    project = _projection(row_fields, fields)
+    return dumps([dict(zip(fields, project(row))) for row in rows])
+
+
+def encode_row(row, fields: tuple = None) -> bytes:
+    fields = tuple(fields or row._fields)
+    return dumps(dict(zip(fields, _projection(row._fields, fields)(row))))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,27 @@
+"""
+Gunicorn worker running the app on uvicorn, configured from the environment.
+
+Used by ``gunicorn.conf.py``; see there for the process model (worker count,
+preloading, graceful restarts and draining).
+"""
+from uvicorn.workers import UvicornWorker
+import os
+
+# Event loop and HTTP parser: "auto" picks uvloop/httptools when installed
+# and falls back to asyncio/h11 otherwise
+WEB_LOOP = os.getenv("WEB_LOOP", "auto")
+WEB_HTTP = os.getenv("WEB_HTTP", "auto")
+# Time left after draining for the lifespan shutdown (pools, trace export)
+SHUTDOWN_MARGIN = 5
+
+
+class AppWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": WEB_LOOP, "http": WEB_HTTP}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # On SIGTERM uvicorn stops accepting, closes idle keep-alive
+        # connections and waits for in-flight requests. Cap that wait so the
+        # lifespan shutdown still runs before gunicorn's graceful_timeout
+        # kills the worker.
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - SHUTDOWN_MARGIN)
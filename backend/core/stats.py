@@ -0,0 +1,285 @@
+"""
+Catalogue statistics (counts, price summary, percentiles, histogram), global
+and per seller, kept up to date in the background.
+
+The prices are held as one compact float64 array per seller. Writers only
+mark their seller dirty after committing (``mark_dirty``); every
+STATS_REFRESH_INTERVAL seconds the refresher re-reads the prices of the
+dirty sellers (one indexed query per batch of sellers), recomputes their
+summaries and the global one with vectorized NumPy in a worker thread, and
+stores every summary already encoded. Serving stats is a dict lookup,
+whatever the catalogue size.
+
+State is per process: writes committed by other workers are picked up by the
+full reload every STATS_RELOAD_INTERVAL seconds. NumPy is only imported by
+the first computation, in the worker thread; without it the same numbers are
+computed in pure Python, only slower.
+"""
+from datetime import datetime
+from sqlalchemy import select
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+
+from core.serialization import dumps
+from models.models import Product
+
+# NumPy module, False when it is not installed, None until first needed
+_numpy = None
+
+STATS_REFRESH_INTERVAL = float(os.getenv("STATS_REFRESH_INTERVAL", 2))
+STATS_RELOAD_INTERVAL = float(os.getenv("STATS_RELOAD_INTERVAL", 300))  # 0 = never
+STATS_HISTOGRAM_BINS = int(os.getenv("STATS_HISTOGRAM_BINS", 10))
+# How long a request waits for the initial load before getting a 503
+STATS_READY_TIMEOUT = float(os.getenv("STATS_READY_TIMEOUT", 10))
+STATS_LOAD_BATCH_SIZE = 10000
+# Dirty sellers re-read per query
+STATS_DIRTY_BATCH_SIZE = 500
+
+PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+logger = logging.getLogger("stats")
+
+
+def _np():
+    # Imported on first use, from the refresher's worker thread: it costs
+    # more import time than the rest of the app, so keep it off startup
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # optional dependency
+            _numpy = False
+    return _numpy or None
+
+
+def _as_array(prices):
+    np = _np()
+    if np is not None:
+        return np.asarray(prices, dtype=np.float64)
+    return [float(price) for price in prices]
+
+
+def _concatenate(arrays):
+    np = _np()
+    if np is not None:
+        return np.concatenate(arrays) if arrays else np.empty(0)
+    return [price for prices in arrays for price in prices]
+
+
+def _percentiles(values, count: int) -> list:
+    # Linear interpolation between closest ranks (NumPy's default)
+    np = _np()
+    if np is not None:
+        return np.percentile(values, PERCENTILES).tolist()
+    ordered = sorted(values)
+    result = []
+    for pct in PERCENTILES:
+        rank = (count - 1) * pct / 100
+        low, high = math.floor(rank), math.ceil(rank)
+        result.append(ordered[low] + (ordered[high] - ordered[low]) * (rank - low))
+    return result
+
+
+def _histogram(values, low: float, high: float, bins: int):
+    np = _np()
+    if np is not None:
+        counts, edges = np.histogram(values, bins=bins, range=(low, high))
+        return counts.tolist(), edges.tolist()
+    if high == low:
+        # Same degenerate range NumPy uses for a single distinct value
+        low, high = low - 0.5, high + 0.5
+    width = (high - low) / bins
+    counts = [0] * bins
+    for value in values:
+        counts[min(bins - 1, int((value - low) / width))] += 1
+    return counts, [low + width * i for i in range(bins)] + [high]
+
+
+def _group(rows, user_ids=()) -> dict:
+    # (user_id, price) rows -> price array per seller; listed sellers without
+    # rows get an empty one
+    grouped = {user_id: [] for user_id in user_ids}
+    for user_id, price in rows:
+        grouped.setdefault(user_id, []).append(price)
+    return {user_id: _as_array(prices) for user_id, prices in grouped.items()}
+
+
+def summarize(prices, bins: int = STATS_HISTOGRAM_BINS) -> dict:
+    """Count, price summary, percentiles and histogram of one price array."""
+    count = len(prices)
+    if count == 0:
+        return {"count": 0, "price": None, "histogram": None}
+    if _np() is not None:
+        low, high, total = float(prices.min()), float(prices.max()), float(prices.sum())
+    else:
+        low, high, total = min(prices), max(prices), math.fsum(prices)
+    counts, edges = _histogram(prices, low, high, bins)
+    return {
+        "count": count,
+        "price": {
+            "min": low,
+            "max": high,
+            "avg": round(total / count, 6),
+            "sum": round(total, 6),
+            "percentiles": {f"p{pct}": round(value, 6)
+                            for pct, value in zip(PERCENTILES, _percentiles(prices, count))},
+        },
+        "histogram": {"edges": [round(edge, 6) for edge in edges], "counts": counts},
+    }
+
+
+class StatsUnavailable(Exception):
+    """Raised when the initial load has not finished in time."""
+
+
+class CatalogueStats:
+    def __init__(self, session_factory, refresh_interval: float = STATS_REFRESH_INTERVAL,
+                 reload_interval: float = STATS_RELOAD_INTERVAL, bins: int = STATS_HISTOGRAM_BINS):
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self.bins = bins
+        self._prices = {}  # user_id -> price array
+        self._encoded = {}  # user_id (None = global) -> encoded summary
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._ready = None
+        self._task = None
+        self.refreshes = 0
+        self.reloads = 0
+        self.last_refresh_ms = 0.0
+
+    def mark_dirty(self, user_id: str):
+        """Called by writers after their commit."""
+        self._dirty.add(user_id)
+
+    async def _load_all(self) -> list:
+        # Raw (user_id, price) rows; grouping them happens in the worker thread
+        rows = []
+        query = select(Product.user_id, Product.price).filter(Product.price.is_not(None))
+        async with self.session_factory(info={"replica": True}) as session:
+            result = await session.stream(query.execution_options(yield_per=STATS_LOAD_BATCH_SIZE))
+            async for partition in result.partitions():
+                rows.extend(partition)
+        return rows
+
+    async def _load_users(self, user_ids) -> list:
+        # Primary, so a seller's own writes are never missed
+        rows = []
+        ids = list(user_ids)
+        async with self.session_factory() as session:
+            for start in range(0, len(ids), STATS_DIRTY_BATCH_SIZE):
+                result = await session.execute(
+                    select(Product.user_id, Product.price).filter(
+                        Product.user_id.in_(ids[start:start + STATS_DIRTY_BATCH_SIZE]),
+                        Product.price.is_not(None),
+                    )
+                )
+                rows.extend(result.all())
+        return rows
+
+    def _encode(self, prices, **scope) -> bytes:
+        return dumps({**scope, **summarize(prices, self.bins), "as_of": datetime.utcnow().isoformat()})
+
+    def _recompute(self, rows: list, dirty_rows: list, dirty, full: bool):
+        # Worker thread: everything O(n) happens here, never on the event loop.
+        # ``rows`` is the full load (when ``full``), ``dirty_rows`` the dirty
+        # sellers re-read from the primary, which override it.
+        loaded = _group(rows) if full else None
+        changed = _group(dirty_rows, dirty)
+        with self._lock:
+            if full:
+                self._prices = loaded
+            for user_id, prices in changed.items():
+                if len(prices):
+                    self._prices[user_id] = prices
+                else:
+                    self._prices.pop(user_id, None)
+            arrays = list(self._prices.values())
+        encoded = {None: self._encode(_concatenate(arrays), scope="global", user_id=None)}
+        for user_id, prices in (self._prices.items() if full else changed.items()):
+            encoded[user_id] = self._encode(prices, scope="user", user_id=user_id)
+        with self._lock:
+            if full:
+                self._encoded = encoded
+            else:
+                self._encoded.update(encoded)
+
+    async def refresh(self):
+        start = time.perf_counter()
+        full = self._loaded_at is None or (
+            self.reload_interval > 0 and time.monotonic() - self._loaded_at >= self.reload_interval
+        )
+        # Marks arriving from now on wait for the next round
+        dirty, self._dirty = self._dirty, set()
+        try:
+            if not full and not dirty:
+                return
+            rows = await self._load_all() if full else []
+            # Also after a full load: it comes from a replica, which may not
+            # have the writes that marked these sellers yet
+            dirty_rows = await self._load_users(dirty) if dirty else []
+            await asyncio.to_thread(self._recompute, rows, dirty_rows, dirty, full)
+        except BaseException:
+            self._dirty |= dirty  # retried next round
+            raise
+        if full:
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - start) * 1000, 3)
+        self._ready.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep serving the previous summaries
+                logger.exception("Catalogue stats refresh failed")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None:
+            # Fresh state: the next refresh is a full load
+            self._loaded_at = None
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def get(self, user_id: str = None) -> bytes:
+        """Encoded summary for one seller, or the whole catalogue (``user_id=None``)."""
+        if self._ready is None:
+            raise RuntimeError("CatalogueStats.start() has not been called")
+        if not self._ready.is_set():
+            # Only the first requests after startup wait, for the initial load
+            try:
+                await asyncio.wait_for(self._ready.wait(), STATS_READY_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise StatsUnavailable()
+        encoded = self._encoded.get(user_id)
+        if encoded is None:
+            # A seller without products
+            encoded = self._encode(_as_array([]), scope="user", user_id=user_id)
+        return encoded
+
+    def stats(self) -> dict:
+        return {
+            "sellers": len(self._prices),
+            "dirty": len(self._dirty),
+            "refreshes": self.refreshes,
+            "reloads": self.reloads,
+            "last_refresh_ms": self.last_refresh_ms,
+            "numpy": bool(_numpy),
+        }
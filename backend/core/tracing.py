@@ -0,0 +1,236 @@
+"""
+Lightweight per-request tracing.
+
+Each HTTP request gets a Trace held in a context variable. Code marks its
+phases with ``span("name")`` (JWT decode, user lookup, main query, commit...),
+SQL statements are timed through engine events and the time between the
+endpoint returning and the response starting is recorded as ``serialize``
+(response-model validation and rendering). The spans are summarized in a
+``Server-Timing`` header and optionally appended to a JSONL file.
+
+In debug mode every statement text is kept so requests issuing too many
+statements, or the same statement over and over (N+1 lazy loads), are logged.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from fastapi.routing import APIRoute
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# JSONL file the finished traces are appended to (disabled when empty)
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_EXPORT_BATCH = int(os.getenv("TRACE_EXPORT_BATCH", 100))
+# N+1 detector
+TRACE_DEBUG = os.getenv("TRACE_DEBUG", "false").lower() == "true"
+TRACE_MAX_STATEMENTS = int(os.getenv("TRACE_MAX_STATEMENTS", 20))
+TRACE_MAX_REPEATS = int(os.getenv("TRACE_MAX_REPEATS", 5))
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+logger = logging.getLogger("tracing")
+
+_current_trace: ContextVar = ContextVar("trace", default=None)
+
+
+class Trace:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status_code = None
+        self.started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        # name -> accumulated seconds, in first-seen order
+        self.spans = {}
+        self.db_time = 0.0
+        self.db_statements = 0
+        self.statements = Counter() if TRACE_DEBUG else None
+        self.endpoint_end = None
+        self.duration = None
+
+    def add_span(self, name: str, elapsed: float):
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={elapsed * 1000:.3f}" for name, elapsed in self.spans.items()]
+        if self.db_statements:
+            entries.append(f'db;dur={self.db_time * 1000:.3f};desc="{self.db_statements} statements"')
+        entries.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(entries)
+
+    def problems(self) -> list:
+        # N+1 heuristics, only meaningful in debug mode
+        if self.statements is None:
+            return []
+        problems = []
+        if self.db_statements > TRACE_MAX_STATEMENTS:
+            problems.append(f"{self.db_statements} statements (limit {TRACE_MAX_STATEMENTS})")
+        for statement, count in self.statements.most_common():
+            if count <= TRACE_MAX_REPEATS:
+                break
+            problems.append(f"statement repeated {count} times: {' '.join(statement.split())[:200]}")
+        return problems
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((self.duration or self.elapsed()) * 1000, 3),
+            "spans": {name: round(elapsed * 1000, 3) for name, elapsed in self.spans.items()},
+            "db": {"statements": self.db_statements, "duration_ms": round(self.db_time * 1000, 3)},
+            "problems": self.problems(),
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as phase ``name`` of the current request (no-op outside one)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(name, time.perf_counter() - start)
+
+
+class JsonlExporter:
+    """Buffers finished traces and appends them to a JSONL file in batches."""
+
+    def __init__(self, path: str, batch_size: int = TRACE_EXPORT_BATCH):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        self._buffer.append(trace.to_dict())
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            if not records:
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+
+
+exporter = JsonlExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening a Trace per HTTP request and adding Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status_code = message["status"]
+                if trace.endpoint_end is not None:
+                    trace.add_span("serialize", time.perf_counter() - trace.endpoint_end)
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", trace.server_timing().encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.duration = trace.elapsed()
+            route = scope.get("route")
+            trace.route = route.path if route is not None else None
+            problems = trace.problems()
+            if problems:
+                logger.warning("%s %s: possible N+1 queries: %s", trace.method, trace.path, "; ".join(problems))
+            if exporter is not None:
+                exporter.export(trace)
+
+
+class TracedRoute(APIRoute):
+    """
+    APIRoute that records the endpoint's own run time as the ``endpoint`` span,
+    so the response-model validation that follows can be timed on its own.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router() builds the route again from the already wrapped endpoint
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "_traced", False):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _traced_endpoint(endpoint):
+    @wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        trace = _current_trace.get()
+        if trace is None:
+            return await endpoint(*args, **kwargs)
+        with span("endpoint"):
+            result = await endpoint(*args, **kwargs)
+        trace.endpoint_end = time.perf_counter()
+        return result
+    wrapper._traced = True
+    return wrapper
+
+
+def instrument_engine(engine):
+    """Attribute the statements run on ``engine`` to the current request's trace."""
+    from sqlalchemy import event
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_trace.get() is not None:
+            conn.info.setdefault("trace_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace = _current_trace.get()
+        starts = conn.info.get("trace_start")
+        if trace is None or not starts:
+            return
+        trace.db_time += time.perf_counter() - starts.pop()
+        trace.db_statements += 1
+        if trace.statements is not None:
+            trace.statements[statement] += 1
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        if _current_trace.get() is None or context.connection is None:
+            return
+        starts = context.connection.info.get("trace_start")
+        if starts:
+            starts.pop()
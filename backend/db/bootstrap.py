@@ -0,0 +1,25 @@
+"""
+Create the database schema: all tables plus the full-text search index.
+
+    python -m db.bootstrap
+
+Run once per deploy, before starting the workers, instead of having every
+worker issue the DDL checks on startup. Existing tables are left untouched,
+except that text ids are first converted to UUIDs (``db.migrate_ids``).
+"""
+import asyncio
+
+from db.database import SQLALCHEMY_DATABASE_URL, create_tables, dispose_engines
+import models.models  # noqa: F401  (register the models on Base)
+
+
+async def main():
+    try:
+        await create_tables()
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+    print(f"Schema ready on {SQLALCHEMY_DATABASE_URL.rpartition('@')[2]}")
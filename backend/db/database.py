@@ -1,24 +1,164 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from itertools import cycle
 import os
+import time
+
+from core import metrics, tracing
+from core.cache import TTLCache
 
 # Database connection string
-SQLALCHEMY_DATABASE_URL = "postgresql://postgres:postgres@db:5432/product_db"
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL", "postgresql://postgres:postgres@db:5432/product_db"
+)
+# Optional read replicas, comma separated; GET/HEAD requests read from them
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+# Pool settings (ignored by SQLite, which does not use a queue pool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", -1))  # seconds, -1 = never
+# Server-side statement timeout in milliseconds (Postgres only, 0 = none)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+# After a user writes, their reads stay on the primary for this long
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+
+# Map plain URLs to their async driver (asyncpg for Postgres, aiosqlite for SQLite)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Requests that never write, so they may be served by a replica
+READ_METHODS = {"GET", "HEAD"}
+
+def get_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        # An explicit driver was given, use it as is
+        return url
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool recording how long each checkout waited for a connection."""
+    label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.db_pool_checkout_wait.observe(elapsed, self.label)
+            trace = tracing.current_trace()
+            if trace is not None:
+                trace.add_span("pool", elapsed)
+
+
+def engine_options(url: str, label: str = "primary") -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.startswith("sqlite"):
+        return options
+    options.update(
+        # Subclass per engine so the label survives pool recreation on dispose()
+        poolclass=type(f"TimedQueuePool[{label}]", (TimedQueuePool,), {"label": label}),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if DB_STATEMENT_TIMEOUT_MS and get_async_url(url).startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    return options
+
+def create_engine_for(url: str, label: str = "primary"):
+    return create_async_engine(get_async_url(url), **engine_options(url, label))
+
+# Create async SQLAlchemy engines
+engine = create_engine_for(SQLALCHEMY_DATABASE_URL)
+replica_engines = [create_engine_for(url, f"replica{i}") for i, url in enumerate(DATABASE_REPLICA_URLS)]
+
+# Users who wrote recently, read from the primary until replicas catch up.
+# Per process: with several workers a user's next request may land elsewhere,
+# which DB_REPLICA_STICKY_SECONDS only approximates.
+recent_writers = TTLCache(maxsize=10000, ttl=DB_REPLICA_STICKY_SECONDS)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of replica-eligible sessions
+    (``info["replica"]``) to a read replica and everything else to the primary.
+
+    Read-your-writes: once a session writes, the rest of it stays on the
+    primary, and so do the reads of a user who wrote within the last
+    DB_REPLICA_STICKY_SECONDS (``info["user_id"]``, set on authentication).
+    """
+    primary = engine
+    replicas = replica_engines
+    _replica_cycle = cycle(replica_engines) if replica_engines else None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False) or getattr(clause, "_for_update_arg", None):
+            self.info["wrote"] = True
+            if self.info.get("user_id") is not None:
+                recent_writers.set(self.info["user_id"], True)
+            return self.primary.sync_engine
+        if (self.replicas and self.info.get("replica") and not self.info.get("wrote")
+                and recent_writers.get(self.info.get("user_id")) is None):
+            # One replica per session, so its reads see a single snapshot
+            if "replica_engine" not in self.info:
+                self.info["replica_engine"] = next(self._replica_cycle)
+            return self.info["replica_engine"].sync_engine
+        return self.primary.sync_engine
+
+
+def read_from_primary(session) -> bool:
+    """Whether ``session`` has not read from a replica, so what it read can go
+    into a cache shared by requests that must not see replica lag."""
+    return "replica_engine" not in session.info
 
-# Create SQLAlchemy engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False so handlers can read ORM attributes after commit
+# without triggering implicit (blocking) lazy loads
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=AsyncSession, sync_session_class=RoutingSession,
+    autoflush=False, expire_on_commit=False,
+)
 
 # Create Base class
 Base = declarative_base()
 
+def create_missing_indexes(connection):
+    # create_all skips existing tables, and with them any index added later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+# Create the tables for all the models registered on Base
+async def create_tables():
+    from db.migrate_ids import migrate_ids
+    from db.search import ensure_search_index
+    async with engine.begin() as conn:
+        # Text ids of databases created before CompactUUID: the models can
+        # not read them, so convert them before anything else
+        await conn.run_sync(migrate_ids)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+        # Also covers tables created before the search index existed
+        await conn.run_sync(ensure_search_index)
+
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db(request: Request):
+    # Read-only requests may be served by a replica
+    async with SessionLocal(info={"replica": request.method in READ_METHODS}) as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+async def dispose_engines():
+    for each in [engine, *replica_engines]:
+        await each.dispose()
@@ -0,0 +1,150 @@
+"""
+Convert the text ids of an existing database to 16-byte UUIDs.
+
+    python -m db.migrate_ids
+
+Databases created before ids became ``CompactUUID`` store ``users.id``,
+``products.id`` and ``products.user_id`` as text. This rewrites them in place,
+in one transaction, keeping every id's value: ids already handed out (uuid4)
+stay valid, only new rows get time-ordered ones.
+
+- Postgres: ``ALTER COLUMN ... TYPE uuid``, with the foreign key dropped and
+  added back around it; the indexes are rebuilt by the ALTER.
+- SQLite (no ALTER COLUMN TYPE): each table is renamed, recreated with the
+  current definition and indexes, and its rows copied over with the ids
+  converted; the full-text index is rebuilt at the end.
+
+``python -m db.bootstrap`` (the deploy step) runs it before creating the
+schema, with the workers stopped; it can also be run on its own. It does
+nothing on a schema that is already converted, and stops without changing
+anything when an id is not a UUID.
+"""
+from sqlalchemy import String, create_engine, inspect
+from uuid import UUID
+import time
+
+from db.database import SQLALCHEMY_DATABASE_URL
+from db.search import drop_search_index, ensure_search_index
+from models.models import Product, User
+
+# Tables in foreign key order, with their id columns
+ID_COLUMNS = {
+    User.__table__: ("id",),
+    Product.__table__: ("id", "user_id"),
+}
+
+
+def needs_migration(connection) -> bool:
+    inspector = inspect(connection)
+    if not inspector.has_table(User.__tablename__):
+        return False
+    columns = {column["name"]: column["type"] for column in inspector.get_columns(User.__tablename__)}
+    return isinstance(columns["id"], String)
+
+
+def _uuid_blob(value):
+    # Called by SQLite for every id copied (all checked by _check_sqlite_ids)
+    return None if value is None else UUID(value).bytes
+
+
+def _is_uuid(value) -> int:
+    try:
+        UUID(value)
+        return 1
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
+def _check_sqlite_ids(connection):
+    # SQLite hides what a function raised, so find bad ids before copying
+    bad = []
+    for table, id_columns in ID_COLUMNS.items():
+        for name in id_columns:
+            bad += connection.exec_driver_sql(
+                f"SELECT {name} FROM {table.name} WHERE {name} IS NOT NULL AND NOT is_uuid({name}) LIMIT 10"
+            ).scalars().all()
+    if bad:
+        raise ValueError(f"Ids that are not UUIDs: {', '.join(map(repr, bad[:10]))}")
+
+
+def _migrate_sqlite(connection):
+    # The DBAPI connection: sqlite3's, or aiosqlite's adapter when run from
+    # create_tables (bootstrap)
+    dbapi = connection.connection
+    dbapi.create_function("uuid_blob", 1, _uuid_blob, deterministic=True)
+    dbapi.create_function("is_uuid", 1, _is_uuid, deterministic=True)
+    _check_sqlite_ids(connection)
+    # Rebuilt once at the end instead of maintained row by row
+    drop_search_index(connection)
+    legacy_tables = []
+    for table, id_columns in ID_COLUMNS.items():
+        legacy = f"{table.name}_legacy"
+        connection.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {legacy}")
+        # Its indexes keep their names: free them for the new table
+        indexes = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (legacy,),
+        ).scalars().all()
+        for index in indexes:
+            connection.exec_driver_sql(f"DROP INDEX {index}")
+        table.create(connection)
+        # Creating products also created the search index: drop it again
+        drop_search_index(connection)
+        names = [column.name for column in table.columns]
+        values = [f"uuid_blob({name})" if name in id_columns else name for name in names]
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} ({', '.join(names)}) SELECT {', '.join(values)} FROM {legacy}"
+        )
+        legacy_tables.append(legacy)
+    # Children first
+    for legacy in reversed(legacy_tables):
+        connection.exec_driver_sql(f"DROP TABLE {legacy}")
+    ensure_search_index(connection)
+
+
+def _migrate_postgres(connection):
+    foreign_keys = inspect(connection).get_foreign_keys(Product.__tablename__)
+    for foreign_key in foreign_keys:
+        connection.exec_driver_sql(f'ALTER TABLE products DROP CONSTRAINT "{foreign_key["name"]}"')
+    for table, id_columns in ID_COLUMNS.items():
+        changes = ", ".join(f"ALTER COLUMN {name} TYPE uuid USING {name}::uuid" for name in id_columns)
+        connection.exec_driver_sql(f"ALTER TABLE {table.name} {changes}")
+    for foreign_key in foreign_keys:
+        connection.exec_driver_sql(
+            f'ALTER TABLE products ADD CONSTRAINT "{foreign_key["name"]}" '
+            f'FOREIGN KEY ({", ".join(foreign_key["constrained_columns"])}) '
+            f'REFERENCES {foreign_key["referred_table"]} ({", ".join(foreign_key["referred_columns"])})'
+        )
+
+
+def migrate_ids(connection) -> bool:
+    """Convert the id columns if needed; returns whether anything changed. Takes a sync connection."""
+    if not needs_migration(connection):
+        return False
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        _migrate_sqlite(connection)
+    elif dialect == "postgresql":
+        _migrate_postgres(connection)
+    else:
+        raise NotImplementedError(f"Id migration is not supported on {dialect}")
+    return True
+
+
+def main():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    start = time.perf_counter()
+    try:
+        with engine.begin() as connection:
+            changed = migrate_ids(connection)
+    finally:
+        engine.dispose()
+    where = SQLALCHEMY_DATABASE_URL.rpartition("@")[2]
+    if changed:
+        print(f"Ids converted on {where} in {time.perf_counter() - start:.1f}s")
+    else:
+        print(f"Ids already up to date on {where}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Full-text search index over product name and description.
+
+- SQLite: an external-content FTS5 table (``products_fts``) kept in sync with
+  ``products`` by triggers, ranked with bm25. Its rows are keyed on
+  ``products.id`` (through ``products_fts_ids``), not on the implicit rowid.
+- Postgres: a generated ``tsvector`` column with a GIN index, ranked with
+  ts_rank.
+
+Either way the index is maintained by the database itself inside the same
+transaction as the write, so every insert/update/delete on ``products``
+(including bulk statements) keeps it in sync.
+"""
+from sqlalchemy import event, text
+from models.models import Product
+from core.serialization import PRODUCT_COLUMNS
+import re
+
+# Name matches weigh more than description matches
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# products has no INTEGER PRIMARY KEY, so VACUUM may renumber its rowids:
+# the FTS rows are keyed on products_fts_ids.docid instead, which maps them
+# to products.id and survives a VACUUM. The FTS table reads its content
+# through the products_fts_content view.
+SQLITE_DDL = [
+    """CREATE TABLE IF NOT EXISTS products_fts_ids (
+        docid INTEGER PRIMARY KEY, product_id NOT NULL UNIQUE
+    )""",
+    """CREATE VIEW IF NOT EXISTS products_fts_content AS
+        SELECT products_fts_ids.docid, products.name, products.description
+        FROM products_fts_ids JOIN products ON products.id = products_fts_ids.product_id""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products_fts_content', content_rowid='docid', tokenize='unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts_ids(product_id) VALUES (new.id);
+        INSERT INTO products_fts(rowid, name, description) VALUES (last_insert_rowid(), new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES (
+            'delete', (SELECT docid FROM products_fts_ids WHERE product_id = old.id), old.name, old.description
+        );
+        DELETE FROM products_fts_ids WHERE product_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES (
+            'delete', (SELECT docid FROM products_fts_ids WHERE product_id = old.id), old.name, old.description
+        );
+        INSERT INTO products_fts(rowid, name, description) VALUES (
+            (SELECT docid FROM products_fts_ids WHERE product_id = new.id), new.name, new.description
+        );
+    END""",
+]
+
+SQLITE_FTS_TRIGGERS = ("products_fts_ai", "products_fts_ad", "products_fts_au")
+
+POSTGRES_DDL = [
+    """ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+
+def ensure_search_index(connection):
+    """Create the search index if missing. Takes a sync connection (use ``run_sync``)."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts_ids'"
+        ).first()
+        if not exists:
+            # Also replaces an index keyed on products.rowid (older layout)
+            drop_search_index(connection)
+        for statement in SQLITE_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            # Index the rows that were already there
+            connection.exec_driver_sql("INSERT INTO products_fts_ids(product_id) SELECT id FROM products")
+            connection.exec_driver_sql("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+
+
+def drop_search_index(connection):
+    """Drop the search index (and on SQLite the triggers maintaining it). Takes a sync connection."""
+    if connection.dialect.name == "sqlite":
+        for trigger in SQLITE_FTS_TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS products_fts")
+        connection.exec_driver_sql("DROP VIEW IF EXISTS products_fts_content")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS products_fts_ids")
+    elif connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("DROP INDEX IF EXISTS ix_products_search_vector")
+
+
+# Keep the index tied to the products table lifecycle (create_all / drop_all)
+@event.listens_for(Product.__table__, "after_create")
+def _after_products_create(target, connection, **kw):
+    ensure_search_index(connection)
+
+@event.listens_for(Product.__table__, "before_drop")
+def _before_products_drop(target, connection, **kw):
+    drop_search_index(connection)
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every word so user input can never be parsed as FTS5 syntax;
+    # the terms are ANDed together
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", q))
+
+
+async def search_products(db, q: str, skip: int = 0, limit: int = 20, columns=PRODUCT_COLUMNS):
+    """Return ``columns`` (all ProductResponse ones by default) of products matching ``q``, most relevant first."""
+    names = ", ".join(f"products.{column.name}" for column in columns)
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        match = _fts5_query(q)
+        if not match:
+            return []
+        # Rank inside the FTS table first, then look up only the page's rows
+        statement = text(
+            f"SELECT {names} FROM ("
+            f"SELECT rowid AS docid, bm25(products_fts, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) AS score "
+            "FROM products_fts WHERE products_fts MATCH :q ORDER BY score LIMIT :limit OFFSET :skip"
+            ") AS matches "
+            "JOIN products_fts_ids ON products_fts_ids.docid = matches.docid "
+            "JOIN products ON products.id = products_fts_ids.product_id "
+            "ORDER BY matches.score"
+        ).bindparams(q=match, limit=limit, skip=skip)
+    elif dialect == "postgresql":
+        statement = text(
+            f"SELECT {names} FROM products, websearch_to_tsquery('simple', :q) AS query "
+            "WHERE products.search_vector @@ query "
+            "ORDER BY ts_rank(products.search_vector, query) DESC "
+            "LIMIT :limit OFFSET :skip"
+        ).bindparams(q=q, limit=limit, skip=skip)
+    else:
+        raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+    # Typed columns, so ids come back in their string form
+    result = await db.execute(statement.columns(*columns))
+    return result.all()
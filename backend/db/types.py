@@ -0,0 +1,41 @@
+"""
+Column types shared by the models.
+"""
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+from uuid import UUID
+
+
+class CompactUUID(TypeDecorator):
+    """
+    A UUID stored as Postgres' native 16-byte ``uuid``, or as a 16-byte
+    BLOB elsewhere (SQLite), instead of its 36-character text form.
+
+    Python code keeps using canonical strings: values are bound from ``str``
+    (or ``uuid.UUID``) and read back as ``str``. Binding something that is
+    not a UUID raises ValueError, so callers validate client input first
+    (``core.ids.parse_id``).
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, UUID):
+            value = UUID(value)
+        return value if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = UUID(bytes=value)
+        return str(value)
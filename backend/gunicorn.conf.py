@@ -0,0 +1,46 @@
+"""
+Production server configuration, picked up by ``gunicorn main:app``.
+
+- One uvicorn worker per core by default (WEB_CONCURRENCY overrides it).
+- Each worker has its own bcrypt process pool. Unless HASH_WORKERS is set,
+  the cores are shared out between the workers' pools, so the server runs
+  about one hashing process per core rather than one per core per worker.
+- The app is imported once in the master and the workers are forked from it
+  (PRELOAD_APP), so they share the imported code pages and start in
+  milliseconds. Each worker still runs the lifespan startup itself.
+- ``kill -HUP <master>`` restarts the workers one generation at a time: new
+  workers are forked before the old ones are told to stop. With PRELOAD_APP
+  the code is not re-imported; deploy new code with ``USR2`` then ``QUIT``
+  on the old master, or by restarting the container.
+- On SIGTERM, every worker stops accepting connections and drains in-flight
+  requests for up to GRACEFUL_TIMEOUT seconds before it is killed.
+- MAX_REQUESTS recycles a worker after that many requests (0 = never),
+  with up to MAX_REQUESTS_JITTER extra so workers do not restart together.
+
+The schema is not created here; run ``python -m db.bootstrap`` first.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+# Read by core.hashing when the app is imported, after this file
+os.environ.setdefault("HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+worker_class = "core.server.AppWorker"
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+# A worker blocked this long without notifying the master is restarted
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))
+keepalive = int(os.getenv("KEEPALIVE", 5))
+max_requests = int(os.getenv("MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 0))
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def post_fork(server, worker):
+    # A preloaded app's engines were created in the master: drop any pooled
+    # connections inherited through fork, so each worker opens its own
+    if preload_app:
+        from db.database import engine, replica_engines
+        for each in [engine, *replica_engines]:
+            each.sync_engine.dispose(close=False)
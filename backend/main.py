@@ -1,27 +1,51 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from db.database import engine, Base, get_db
-from sqlalchemy import text
-from sqlalchemy.orm import Session
-from routers import auth, users, products
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
+from db.database import engine, replica_engines, create_tables, dispose_engines
+from core.hashing import hasher, HashingQueueFull
+from core import metrics, ratelimit, tracing
+from routers import auth, users, products, health
 import models.models as models
-import uvicorn
-import time
-import platform
-import psutil
 import os
-from datetime import datetime
+
+# The schema is managed by ``python -m db.bootstrap``, run once per deploy.
+# Set to true to also create missing tables when a worker starts (local dev).
+DB_CREATE_TABLES_ON_STARTUP = os.getenv("DB_CREATE_TABLES_ON_STARTUP", "false").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_CREATE_TABLES_ON_STARTUP:
+        await create_tables()
+    health.sampler.start()
+    products.catalogue_stats.start()
+    yield
+    # Release pooled connections when the worker stops
+    await health.sampler.stop()
+    await products.catalogue_stats.stop()
+    await products.product_writer.stop()
+    await dispose_engines()
+    hasher.shutdown()
+    if tracing.exporter is not None:
+        tracing.exporter.flush()
 
 # Create and configure the FastAPI app
 app = FastAPI(
     title="Product Management API",
     description="API for managing products and users",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Password hashing pool saturated: ask the client to retry instead of queueing
+@app.exception_handler(HashingQueueFull)
+async def hashing_queue_full_handler(request, exc):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
 
 # Configure CORS middleware
 app.add_middleware(
@@ -30,73 +54,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", tracing.SERVER_TIMING_HEADER],
 )
 
+# Per-request phase timings (Server-Timing header, JSONL export, N+1 detector)
+app.add_middleware(tracing.TracingMiddleware)
+
+# Request latency/status metrics. The last middleware added is the
+# outermost, so it also times tracing, CORS and errors
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Metrics sources
+metrics.instrument_engine(engine)
+tracing.instrument_engine(engine)
+for index, replica in enumerate(replica_engines):
+    metrics.instrument_engine(replica, f"replica{index}")
+    tracing.instrument_engine(replica)
+metrics.instrument_stats("password_hashing", "Password hashing pool counters", hasher.stats)
+metrics.instrument_stats("principal_cache", "Authenticated user cache counters", users.principal_cache.stats)
+metrics.instrument_stats("product_cache", "Product response cache counters", products.product_cache.stats)
+metrics.instrument_stats("catalogue_stats", "Catalogue statistics refresher counters", products.catalogue_stats.stats)
+metrics.instrument_stats("product_group_commit", "Group commit batches and rows", products.product_writer.stats)
+metrics.instrument_stats("auth_rate_limiter", "Auth rate limiter buckets and counters", ratelimit.stats)
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(products.router, prefix="/api/products", tags=["Products"])
-
-@app.get("/api/health")
-async def health_check(db: Session = Depends(get_db)):
-    """
-    Health check endpoint to verify the status of the API and its components.
-    Returns detailed information about the application status, database connection,
-    system resources, and performance metrics.
-    """
-    start_time = time.time()
-    
-    # Collect application information
-    app_info = {
-        "name": app.title,
-        "version": app.version,
-        "description": app.description,
-        "uptime": datetime.now().isoformat(),  # In production, track actual uptime
-    }
-    
-    # Check database connection
-    db_status = "healthy"
-    db_error = None
-    try:
-        # Simple query to verify database connection
-        db.execute(text("SELECT 1")).first()
-    except Exception as e:
-        db_status = "unhealthy"
-        db_error = str(e)
-    
-    # Check system resources
-    system_info = {
-        "os": platform.system(),
-        "os_version": platform.version(),
-        "python_version": platform.python_version(),
-        "hostname": platform.node(),
-        "cpu_count": os.cpu_count(),
-        "cpu_usage": psutil.cpu_percent(interval=0.1),
-        "memory_total": round(psutil.virtual_memory().total / (1024 * 1024), 2),  # MB
-        "memory_available": round(psutil.virtual_memory().available / (1024 * 1024), 2),  # MB
-        "memory_used_percent": psutil.virtual_memory().percent,
-        "disk_usage": psutil.disk_usage('/').percent,
-    }
-    
-    # Calculate response time
-    response_time = time.time() - start_time
-    
-    # Determine overall status
-    overall_status = "healthy" if db_status == "healthy" else "degraded"
-    
-    return {
-        "status": overall_status,
-        "timestamp": datetime.now().isoformat(),
-        "application": app_info,
-        "database": {
-            "status": db_status,
-            "error": db_error
-        },
-        "system": system_info,
-        "performance": {
-            "response_time_ms": round(response_time * 1000, 2)
-        }
-    }
+app.include_router(health.router, prefix="/api/health", tags=["Health"])
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,12 +1,15 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Text
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Float, DateTime, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from core.ids import new_id
 from db.database import Base
+from db.types import CompactUUID
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String, primary_key=True, index=True)
+    # Time-ordered UUIDs, 16 bytes on disk; strings in Python and the API
+    id = Column(CompactUUID, primary_key=True, index=True, default=new_id)
     name = Column(String, index=True)
     email = Column(String, unique=True, index=True)
     password = Column(String)
@@ -21,13 +24,24 @@ class User(Base):
 class Product(Base):
     __tablename__ = "products"
 
-    id = Column(String, primary_key=True, index=True)
+    id = Column(CompactUUID, primary_key=True, index=True, default=new_id)
     name = Column(String, index=True)
     description = Column(Text)
     price = Column(Float)
-    user_id = Column(String, ForeignKey("users.id"))
+    user_id = Column(CompactUUID, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship with User
-    user = relationship("User", back_populates="products")
\ No newline at end of file
+    user = relationship("User", back_populates="products")
+
+    # Composite indexes backing keyset pagination by (<sort key>, id), for
+    # the whole catalogue and per owner; they also serve the range filters
+    __table_args__ = (
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_products_updated_at_id", "updated_at", "id"),
+        Index("ix_products_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_user_id_price_id", "user_id", "price", "id"),
+    )
\ No newline at end of file
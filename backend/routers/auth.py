@@ -1,32 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from uuid import uuid4
 from db.database import get_db
+from core.hashing import (
+    pwd_context, verify_password, get_password_hash,
+    verify_password_async, get_password_hash_async,
+)
+from core.ratelimit import throttle_auth
+from core.tracing import TracedRoute, span
+from core.ids import new_id
 from models.models import User
 from schemas.schemas import UserCreate, Token, TokenData
 
 # Auth router
-router = APIRouter()
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+router = APIRouter(route_class=TracedRoute)
 
 # JWT settings
 SECRET_KEY = "YOUR_SECRET_KEY_HERE"  # In production, use a proper secret key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # 1 hour
 
-# Password utils
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
 # Token utils
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -38,31 +35,31 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def email_taken():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered"
+    )
+
 # User auth utils
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await db.scalar(select(User).filter(User.email == email))
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return False
     if not user.is_active:
         return False
     return user
 
 @router.post("/register", response_model=Token)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
-    # Check if email already exists
-    db_user = db.query(User).filter(User.email == user_data.email).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+async def register_user(user_data: UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
+    throttle_auth(request, user_data.email, "register")
+
+    # Create new user; the unique index on email rejects duplicates
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
-        id=str(uuid4()),
+        id=new_id(),
         name=user_data.name,
         email=user_data.email,
         password=hashed_password,
@@ -70,8 +67,12 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     print(f"Creating user: {new_user}")
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    with span("commit"):
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise email_taken()
     
     # Create access token
     token_data = {
@@ -84,10 +85,11 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     # OAuth2PasswordRequestForm uses username field, but we use email for authentication
     email = form_data.username  # Using username field as email
-    user = authenticate_user(db, email, form_data.password)
+    throttle_auth(request, email, "login")
+    user = await authenticate_user(db, email, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+from datetime import datetime
+from db.database import engine
+from core.health import HealthSampler
+from core.hashing import hasher
+from routers.users import principal_cache
+from routers.products import product_cache
+import time
+
+router = APIRouter()
+
+# Started and stopped by the app's startup/shutdown hooks
+sampler = HealthSampler(engine)
+
+@router.get("/live")
+async def liveness():
+    # The process is up and its event loop is serving requests
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness():
+    # Ready when the latest background sample could reach the database
+    sample = sampler.latest()
+    if sample is None:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "starting"})
+    if not sampler.is_fresh(sample) or sample["database"]["status"] != "healthy":
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "database": sample["database"], "sampled_at": sample["timestamp"]},
+        )
+    return {"status": "ready", "sampled_at": sample["timestamp"]}
+
+@router.get("")
+async def health_check(request: Request):
+    """
+    Health check endpoint to verify the status of the API and its components.
+    Returns detailed information about the application status, database connection,
+    system resources, and performance metrics, read from the background sampler.
+    """
+    start_time = time.time()
+    app = request.app
+
+    sample = sampler.latest()
+    if sample is None:
+        # Only before the sampler's first run
+        sample = await sampler.sample()
+
+    # Collect application information
+    app_info = {
+        "name": app.title,
+        "version": app.version,
+        "description": app.description,
+        "started_at": sampler.started_at.isoformat(),
+        "uptime_seconds": sampler.uptime_seconds,
+    }
+
+    # Determine overall status
+    db_status = sample["database"]["status"]
+    overall_status = "healthy" if db_status == "healthy" else "degraded"
+
+    # Calculate response time
+    response_time = time.time() - start_time
+
+    return {
+        "status": overall_status,
+        "timestamp": datetime.now().isoformat(),
+        "application": app_info,
+        "database": sample["database"],
+        "system": {**sampler.platform, **sample["system"]},
+        "sampled_at": sample["timestamp"],
+        "history": sampler.history(),
+        "performance": {
+            "response_time_ms": round(response_time * 1000, 2),
+            "password_hashing": hasher.stats(),
+            "principal_cache": principal_cache.stats(),
+            "product_cache": product_cache.stats()
+        }
+    }
@@ -1,117 +1,633 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from uuid import uuid4
-from db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, false, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timezone
+from pydantic import TypeAdapter, ValidationError
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from urllib.parse import urlencode
+import csv
+import io
+import json
+import os
+from db.database import get_db, read_from_primary, recent_writers, SessionLocal
+from core.ids import new_id, parse_id
 from models.models import Product, User
-from schemas.schemas import ProductCreate, ProductResponse, ProductUpdate
+from schemas.schemas import (
+    ProductCreate, ProductListItem, ProductResponse, ProductUpdate,
+    ProductBulkCreate, ProductBulkUpdate, ProductBulkUpdateItem, ProductBulkDelete,
+    BulkItemResult, BulkResponse,
+)
 from routers.users import get_current_user
+from core.pagination import (
+    DEFAULT_SORT, NEXT_CURSOR_HEADER, SORT_PATTERN, page_query, parse_sort, split_page,
+)
+from core.conditional import (
+    is_conditional, is_not_modified, not_modified_response, validator_headers,
+    item_validators, page_validators,
+)
+from db.search import search_products
+from core.imports import imports, run_import
+from core.cache import create_response_cache
+from core.stats import CatalogueStats, StatsUnavailable
+from core.writebatch import GROUP_COMMIT_ENABLED, WriteCoalescer
+from core.tracing import TracedRoute, span
+from core.serialization import (
+    FAST_SERIALIZATION, LIST_FIELDS, PRODUCT_COLUMNS, PRODUCT_FIELDS, FastJSONResponse,
+    encode_row, encode_rows, field_columns, parse_fields, response_model,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute, default_response_class=FastJSONResponse)
+
+# Rows fetched per round trip by the streaming export
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [column.name for column in Product.__table__.columns]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Serialized product detail and list responses ("memory", "redis" or "none")
+product_cache = create_response_cache(
+    os.getenv("PRODUCT_CACHE_BACKEND", "memory"),
+    maxsize=int(os.getenv("PRODUCT_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("PRODUCT_CACHE_TTL", 300)),
+    redis_url=os.getenv("PRODUCT_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+)
+
+# Catalogue statistics, refreshed in the background (started by the app lifespan)
+catalogue_stats = CatalogueStats(SessionLocal)
+
+# Opt-in group commit of concurrent creations (GROUP_COMMIT_ENABLED)
+product_writer = WriteCoalescer(SessionLocal, Product.__table__)
+
+# Sparse fieldsets: comma separated ProductResponse fields
+FIELDS_DESCRIPTION = "Comma separated fields to return, e.g. name,price"
+
+@lru_cache(maxsize=None)
+def _product_list(fields: tuple) -> TypeAdapter:
+    return TypeAdapter(List[response_model(fields)])
+
+def _encode_products(rows, fields: tuple = PRODUCT_FIELDS) -> bytes:
+    # Rows hold at least the requested ProductResponse columns; extra ones
+    # (selected for validators and cursors) are left out of the payload
+    if FAST_SERIALIZATION:
+        return encode_rows(rows, fields)
+    adapter = _product_list(fields)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+def _encode_product(row, fields: tuple = PRODUCT_FIELDS) -> bytes:
+    if FAST_SERIALIZATION:
+        return encode_row(row, fields)
+    return response_model(fields).model_validate(row).model_dump_json().encode()
+
+def _json_response(body: bytes, headers: dict) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _serve_cached(request: Request, cached, use_modified_since: bool) -> Response:
+    headers, body = cached
+    last_modified = None
+    if use_modified_since and "Last-Modified" in headers:
+        last_modified = parsedate_to_datetime(headers["Last-Modified"])
+    if is_conditional(request) and is_not_modified(request, headers["ETag"], last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return _json_response(body, headers)
+
+async def _invalidate_products(user_id: str, product_ids=()):
+    # After a commit: drop the written products and orphan every list page
+    # that could contain them, and have the owner's statistics recomputed
+    catalogue_stats.mark_dirty(user_id)
+    await product_cache.invalidate(
+        keys=[f"product:{product_id}" for product_id in product_ids],
+        generations=["products", f"user-products:{user_id}"],
+    )
+
+# List filters: query parameter -> WHERE clause. Lower bounds are inclusive,
+# upper bounds exclusive for dates and inclusive for prices.
+PRODUCT_FILTERS = {
+    "user_id": lambda value: owned_by(value),
+    "min_price": lambda value: Product.price >= value,
+    "max_price": lambda value: Product.price <= value,
+    "created_after": lambda value: Product.created_at >= value,
+    "created_before": lambda value: Product.created_at < value,
+    "updated_after": lambda value: Product.updated_at >= value,
+    "updated_before": lambda value: Product.updated_at < value,
+}
+
+def owned_by(user_id: str):
+    # Something that is not an id owns nothing (and cannot be bound as one)
+    return Product.user_id == user_id if parse_id(user_id) else false()
+
+def _not_found():
+    return HTTPException(status_code=404, detail="Product not found")
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Timestamps are stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def product_filters(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+) -> dict:
+    filters = {
+        "min_price": min_price,
+        "max_price": max_price,
+        "created_after": _naive_utc(created_after),
+        "created_before": _naive_utc(created_before),
+        "updated_after": _naive_utc(updated_after),
+        "updated_before": _naive_utc(updated_before),
+    }
+    return {name: value for name, value in filters.items() if value is not None}
+
+def filter_query(query, filters: dict):
+    return query.filter(*[PRODUCT_FILTERS[name](value) for name, value in filters.items()])
+
+async def _list_cache_key(scope: str, limit: int, skip: int, cursor: Optional[str], variant: str = "") -> str:
+    generation = await product_cache.generation(scope)
+    return f"{scope}:{generation}:{limit}:{skip if cursor is None else cursor}:{variant}"
+
+async def _read_page(request: Request, db: AsyncSession, query, scope: str,
+                     limit: int, skip: int, cursor: Optional[str],
+                     filters: dict = None, sort: str = DEFAULT_SORT, fields: tuple = LIST_FIELDS):
+    """
+    Return one page of ``query`` with ETag/Last-Modified validators, through
+    the response cache.
+
+    Only the ``fields`` columns (plus the ones validators and cursors need)
+    are selected and serialized. On a cache miss, a revalidation only reads
+    (id, updated_at, sort key) of the page and answers 304 when nothing on it
+    changed, without loading or serializing the full rows.
+    """
+    filters = filters or {}
+    variant = urlencode(sorted({**filters, "sort": sort, "fields": ",".join(fields)}.items()))
+    cache_key = await _list_cache_key(scope, limit, skip, cursor, variant)
+    cached = await product_cache.get(cache_key)
+    if cached is not None:
+        # Only the ETag can tell a deleted row apart, so If-Modified-Since
+        # alone never yields a 304 for a list
+        return _serve_cached(request, cached, use_modified_since=False)
+    token = product_cache.token()
+
+    page = page_query(filter_query(query, filters), Product, limit, skip=skip, cursor=cursor, sort=sort)
+    if "if-none-match" in request.headers:
+        # The validators need (id, updated_at), the next cursor the sort key
+        key, _ = parse_sort(sort)
+        columns = [Product.id, Product.updated_at] + ([] if key == "updated_at" else [getattr(Product, key)])
+        with span("query"):
+            versions = await db.execute(page.with_only_columns(*columns))
+        rows, next_cursor = split_page(versions.all(), limit, sort)
+        etag, last_modified = page_validators(rows, next_cursor, variant)
+        if is_not_modified(request, etag):
+            extra = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+            return not_modified_response(etag, last_modified, extra)
+
+    columns = field_columns(fields, "id", "updated_at", parse_sort(sort)[0])
+    with span("query"):
+        rows = (await db.execute(page.with_only_columns(*columns))).all()
+        products, next_cursor = split_page(rows, limit, sort)
+    headers = validator_headers(*page_validators(products, next_cursor, variant))
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    # The endpoint returns a ready Response, so encoding happens here
+    with span("serialize"):
+        body = _encode_products(products, fields)
+    # A lagging replica may return what a write just replaced
+    if read_from_primary(db):
+        await product_cache.set(cache_key, headers, body, token)
+    return _json_response(body, headers)
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
+    if GROUP_COMMIT_ENABLED:
+        # Committed together with the other creations of the same window;
+        # every value is set here, so there is nothing to refresh
+        now = datetime.utcnow()
+        row = {
+            "id": new_id(),
+            "name": product.name,
+            "description": product.description,
+            "price": product.price,
+            "user_id": current_user.id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with span("commit"):
+            await product_writer.insert(row)
+            await _invalidate_products(current_user.id)
+        # Written through the coalescer's own session: keep the creator's
+        # next reads on the primary, as a write on the request's session would
+        recent_writers.set(current_user.id, True)
+        return row
+
     new_product = Product(
-        id=str(uuid4()),
+        id=new_id(),
         name=product.name,
         description=product.description,
         price=product.price,
         user_id=current_user.id
     )
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    with span("commit"):
+        await db.commit()
+        await _invalidate_products(current_user.id)
+        await db.refresh(new_product)
     return new_product
 
-@router.get("/", response_model=List[ProductResponse])
+@router.get("/", response_model=List[ProductListItem])
 async def read_products(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    sort: str = Query(DEFAULT_SORT, pattern=SORT_PATTERN),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    filters: dict = Depends(product_filters),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Get all products
-    products = db.query(Product).offset(skip).limit(limit).all()
-    return products
+    # Get all products (or one owner's), filtered and sorted, one page at a
+    # time (keyset mode when a cursor is given), without descriptions unless
+    # requested
+    if user_id is not None:
+        filters = {"user_id": user_id, **filters}
+    return await _read_page(request, db, select(Product), "products", limit, skip, cursor, filters, sort,
+                            parse_fields(fields, LIST_FIELDS))
 
-@router.get("/user", response_model=List[ProductResponse])
+@router.get("/user", response_model=List[ProductListItem])
 async def read_user_products(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort: str = Query(DEFAULT_SORT, pattern=SORT_PATTERN),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    filters: dict = Depends(product_filters),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Get only current user's products
-    products = db.query(Product).filter(Product.user_id == current_user.id).all()
-    return products
+    query = select(Product).filter(Product.user_id == current_user.id)
+    return await _read_page(request, db, query, f"user-products:{current_user.id}", limit, skip, cursor,
+                            filters, sort, parse_fields(fields, LIST_FIELDS))
+
+@router.get("/search", response_model=List[ProductListItem])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Full-text search over name and description, most relevant first
+    fields = parse_fields(fields, LIST_FIELDS)
+    with span("query"):
+        rows = await search_products(db, q, skip=skip, limit=limit, columns=field_columns(fields))
+    with span("serialize"):
+        return Response(content=_encode_products(rows, fields), media_type="application/json")
+
+@router.get("/stats")
+async def read_stats(
+    user_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # Precomputed summary of the whole catalogue, or of one seller's products
+    try:
+        body = await catalogue_stats.get(user_id if user_id is None else parse_id(user_id) or user_id)
+    except StatsUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Statistics are still loading, please retry",
+            headers={"Retry-After": "1"},
+        )
+    return Response(content=body, media_type="application/json")
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def stream_products(format: str, user_id: Optional[str] = None):
+    """
+    Yield the catalogue as NDJSON or CSV chunks, one chunk per batch of rows.
+
+    Rows come from a server-side cursor as plain tuples, so memory stays flat
+    whatever the table size. Runs in its own session because the request's
+    session is closed before a streaming body is sent.
+    """
+    if format == "csv":
+        # Header goes out before the query even starts
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+
+    query = select(*Product.__table__.columns).order_by(Product.created_at, Product.id)
+    if user_id is not None:
+        query = query.filter(owned_by(user_id))
+
+    async with SessionLocal(info={"replica": True}) as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            buffer = io.StringIO()
+            if format == "csv":
+                writer = csv.writer(buffer)
+                writer.writerows([_export_value(value) for value in row] for row in rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps({key: _export_value(value) for key, value in row._mapping.items()}))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+@router.get("/export")
+async def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # Stream the whole catalogue (or one owner's products) without paging
+    return StreamingResponse(
+        stream_products(format, user_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
+
+@router.post("/import")
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Raw NDJSON/CSV body, parsed while it is being uploaded
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    job = imports.create(current_user.id, format)
+    try:
+        # Every committed batch must show up in the cached listings
+        await run_import(db, job, request.stream(), on_commit=lambda: _invalidate_products(current_user.id))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=job.to_dict())
+    return job.to_dict()
+
+@router.get("/import")
+async def read_imports(current_user: User = Depends(get_current_user)):
+    # Progress of the current user's imports, running ones included
+    return [job.to_dict() for job in imports.for_user(current_user.id)]
+
+@router.get("/import/{job_id}")
+async def read_import(job_id: str, current_user: User = Depends(get_current_user)):
+    job = imports.get(job_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job.to_dict()
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    succeeded = sum(1 for result in results if result.status < 400)
+    return BulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+def _check_ownership(items, owners: dict, user_id: str, action: str):
+    # Split (index, id) pairs into writable ones and per-item error results
+    writable, errors, seen = [], [], set()
+    for index, product_id in items:
+        # Owners are keyed by canonical id
+        product_id = parse_id(product_id) or product_id
+        if product_id in seen:
+            errors.append(BulkItemResult(index=index, id=product_id, status=status.HTTP_409_CONFLICT,
+                                         detail="Duplicate id in request"))
+        elif product_id not in owners:
+            errors.append(BulkItemResult(index=index, id=product_id, status=status.HTTP_404_NOT_FOUND,
+                                         detail="Product not found"))
+        elif owners[product_id] != user_id:
+            errors.append(BulkItemResult(index=index, id=product_id, status=status.HTTP_403_FORBIDDEN,
+                                         detail=f"Not authorized to {action} this product"))
+        else:
+            writable.append((index, product_id))
+        seen.add(product_id)
+    return writable, errors
+
+async def _owners(db: AsyncSession, ids: List[str]) -> dict:
+    # One set-based lookup for the whole batch
+    valid = {product_id for product_id in map(parse_id, ids) if product_id is not None}
+    if not valid:
+        return {}
+    rows = await db.execute(select(Product.id, Product.user_id).filter(Product.id.in_(valid)))
+    return dict(rows.all())
+
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_create_products(
+    payload: ProductBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    now = datetime.utcnow()
+    rows, results = [], []
+    for index, item in enumerate(payload.items):
+        try:
+            product = ProductCreate.model_validate(item)
+        except ValidationError as e:
+            results.append(BulkItemResult(index=index, status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                          detail=e.errors(include_url=False, include_context=False)))
+            continue
+        rows.append({
+            "id": new_id(),
+            "name": product.name,
+            "description": product.description,
+            "price": product.price,
+            "user_id": current_user.id,
+            "created_at": now,
+            "updated_at": now,
+        })
+        results.append(BulkItemResult(index=index, id=rows[-1]["id"], status=status.HTTP_201_CREATED))
+
+    # executemany insert, single transaction
+    if rows:
+        with span("commit"):
+            await db.execute(insert(Product), rows)
+            await db.commit()
+            await _invalidate_products(current_user.id)
+    return _bulk_response(results)
+
+@router.put("/bulk", response_model=BulkResponse)
+async def bulk_update_products(
+    payload: ProductBulkUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    results, updates = [], {}
+    for index, item in enumerate(payload.items):
+        try:
+            updates[index] = ProductBulkUpdateItem.model_validate(item)
+        except ValidationError as e:
+            # Echo the id only when it is one (it may be what failed validation)
+            product_id = item.get("id") if isinstance(item.get("id"), str) else None
+            results.append(BulkItemResult(index=index, id=product_id, status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                          detail=e.errors(include_url=False, include_context=False)))
+
+    items = [(index, item.id) for index, item in updates.items()]
+    with span("query"):
+        owners = await _owners(db, [product_id for _, product_id in items]) if items else {}
+    writable, errors = _check_ownership(items, owners, current_user.id, "update")
+    results += errors
+
+    now = datetime.utcnow()
+    rows = []
+    for index, product_id in writable:
+        values = updates[index].model_dump(exclude={"id"}, exclude_none=True)
+        # Nothing to write: leave the row (and its updated_at) alone
+        if values:
+            rows.append({"id": product_id, "updated_at": now, **values})
+        results.append(BulkItemResult(index=index, id=product_id, status=status.HTTP_200_OK))
+
+    # executemany UPDATE ... WHERE id = ?, single transaction
+    if rows:
+        with span("commit"):
+            await db.execute(update(Product), rows)
+            await db.commit()
+            await _invalidate_products(current_user.id, [row["id"] for row in rows])
+    return _bulk_response(sorted(results, key=lambda result: result.index))
+
+@router.post("/bulk/delete", response_model=BulkResponse)
+async def bulk_delete_products(
+    payload: ProductBulkDelete,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    with span("query"):
+        owners = await _owners(db, payload.ids)
+    writable, results = _check_ownership(enumerate(payload.ids), owners, current_user.id, "delete")
+    owned = [product_id for _, product_id in writable]
+    results += [BulkItemResult(index=index, id=product_id, status=status.HTTP_204_NO_CONTENT)
+                for index, product_id in writable]
+
+    # Single DELETE ... WHERE id IN (...), still scoped to the owner
+    if owned:
+        with span("commit"):
+            await db.execute(
+                delete(Product).filter(Product.id.in_(owned), Product.user_id == current_user.id)
+            )
+            await db.commit()
+            await _invalidate_products(current_user.id, owned)
+    return _bulk_response(sorted(results, key=lambda result: result.index))
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def read_product(
     product_id: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    fields = parse_fields(fields, PRODUCT_FIELDS)
+    product_id = parse_id(product_id)
+    if product_id is None:
+        raise _not_found()
+    # Only the full representation is cached; sparse ones are cheap to read
+    sparse = fields != PRODUCT_FIELDS
+    variant = ",".join(fields) if sparse else None
+    cache_key = f"product:{product_id}"
+    if not sparse:
+        cached = await product_cache.get(cache_key)
+        if cached is not None:
+            return _serve_cached(request, cached, use_modified_since=True)
+    token = product_cache.token()
+
+    if is_conditional(request):
+        # Revalidation: check the row version before loading the whole row
+        with span("query"):
+            updated_at = await db.scalar(select(Product.updated_at).filter(Product.id == product_id))
+        if updated_at is not None:
+            etag, last_modified = item_validators(product_id, updated_at, variant)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
+
+    columns = field_columns(fields, "id", "updated_at")
+    with span("query"):
+        product = (await db.execute(select(*columns).filter(Product.id == product_id))).first()
     if product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+        raise _not_found()
+    headers = validator_headers(*item_validators(product.id, product.updated_at, variant))
+    with span("serialize"):
+        body = _encode_product(product, fields)
+    if not sparse and read_from_primary(db):
+        await product_cache.set(cache_key, headers, body, token)
+    return _json_response(body, headers)
+
+async def _write_refused(db: AsyncSession, product_id: str, action: str) -> HTTPException:
+    # The conditional write matched nothing: only now find out why
+    with span("query"):
+        exists = await db.scalar(select(Product.id).filter(Product.id == product_id))
+    if exists is None:
+        return _not_found()
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Not authorized to {action} this product"
+    )
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: str,
     product_update: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Get the product
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Check if current user owns the product
-    if product.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this product"
-        )
-    
-    # Update product data
-    if product_update.name is not None:
-        product.name = product_update.name
-    
-    if product_update.description is not None:
-        product.description = product_update.description
-    
-    if product_update.price is not None:
-        product.price = product_update.price
-    
-    db.commit()
-    db.refresh(product)
-    
-    return product
+    # One UPDATE ... WHERE id AND owner RETURNING: the ownership check, the
+    # write and the read back of the row in a single round trip
+    product_id = parse_id(product_id)
+    if product_id is None:
+        raise _not_found()
+    values = product_update.model_dump(exclude_none=True)
+    # updated_at only moves when something is written
+    values["updated_at"] = datetime.utcnow() if values else Product.updated_at
+    statement = (
+        update(Product)
+        .where(Product.id == product_id, Product.user_id == current_user.id)
+        .values(**values)
+        .returning(*PRODUCT_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    with span("commit"):
+        product = (await db.execute(statement)).first()
+        if product is None:
+            raise await _write_refused(db, product_id, "update")
+        await db.commit()
+        await _invalidate_products(current_user.id, [product_id])
+    with span("serialize"):
+        return _json_response(_encode_product(product), {})
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Get the product
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if product is None:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    # Check if current user owns the product
-    if product.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this product"
-        )
-    
-    # Delete product
-    db.delete(product)
-    db.commit()
+    # One DELETE ... WHERE id AND owner RETURNING id
+    product_id = parse_id(product_id)
+    if product_id is None:
+        raise _not_found()
+    statement = (
+        delete(Product)
+        .where(Product.id == product_id, Product.user_id == current_user.id)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
+    with span("commit"):
+        deleted = await db.scalar(statement)
+        if deleted is None:
+            raise await _write_refused(db, product_id, "delete")
+        await db.commit()
+        await _invalidate_products(current_user.id, [product_id])
     
-    return None
\ No newline at end of file
+    return None
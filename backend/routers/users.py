@@ -1,33 +1,73 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from fastapi.security import OAuth2PasswordBearer
-from db.database import get_db
+from sqlalchemy.orm import make_transient_to_detached
+from db.database import get_db, read_from_primary
 from models.models import User
 from schemas.schemas import UserResponse, UserUpdate, TokenData
-from routers.auth import SECRET_KEY, ALGORITHM
+from routers.auth import SECRET_KEY, ALGORITHM, email_taken
+from core.hashing import get_password_hash_async
+from core.cache import TTLCache
+from core.ids import parse_id
+from core.tracing import TracedRoute, span
+import os
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Active users by id, so authenticated requests skip the users lookup.
+# Entries are dropped as soon as update_user/delete_user commit; the TTL only
+# bounds staleness for changes made by other processes.
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", 30)),
+)
+
+def _user_snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+# Load the active user, from the cache when possible
+async def load_active_user(db: AsyncSession, user_id: str):
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        # Attach a copy to this session without a SELECT, so handlers can
+        # still modify and commit it like a loaded instance
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    version = principal_cache.version()
+    user = await db.scalar(select(User).filter(User.id == user_id))
+    # A lagging replica may still return a deleted or deactivated user
+    if user is not None and user.is_active and read_from_primary(db):
+        principal_cache.set(user_id, _user_snapshot(user), version=version)
+    return user
+
 # Get the current user from token
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
+        with span("jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = parse_id(payload.get("sub"))
         if user_id is None:
             raise credentials_exception
         token_data = TokenData(**payload)
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
+    # Lets the session keep this user's reads on the primary right after a write
+    db.info["user_id"] = user_id
+    with span("auth"):
+        user = await load_active_user(db, user_id)
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -45,40 +85,37 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 async def update_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Update user data
     if user_update.name is not None:
         current_user.name = user_update.name
     
     if user_update.email is not None:
-        # Check if email already exists
-        email_exists = db.query(User).filter(
-            User.email == user_update.email,
-            User.id != current_user.id
-        ).first()
-        if email_exists:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
+        # Uniqueness is enforced by the index on email, at commit
         current_user.email = user_update.email
     
     if user_update.password is not None:
-        from routers.auth import get_password_hash
-        current_user.password = get_password_hash(user_update.password)
+        current_user.password = await get_password_hash_async(user_update.password)
     
-    db.commit()
-    db.refresh(current_user)
+    with span("commit"):
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise email_taken()
+        principal_cache.invalidate(current_user.id)
     
     return current_user
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Logical deletion - set is_active to False
     current_user.is_active = False
-    db.commit()
+    with span("commit"):
+        await db.commit()
+    principal_cache.invalidate(current_user.id)
     return None
\ No newline at end of file
@@ -1,7 +1,11 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 import re
+import os
+
+# Maximum number of items accepted by a bulk request
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 1000))
 
 # User schemas
 class UserBase(BaseModel):
@@ -80,6 +84,49 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+# Listed product: only the fields selected with fields= are present (by
+# default every ProductResponse field but description)
+class ProductListItem(BaseModel):
+    id: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    user_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+# Bulk product schemas
+# Items are validated one by one in the handler so a bad item only fails itself
+class ProductBulkCreate(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class ProductBulkUpdateItem(ProductUpdate):
+    id: str
+
+
+class ProductBulkUpdate(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class ProductBulkDelete(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: int
+    detail: Optional[Any] = None
+
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
 # Authentication schemas
 class Token(BaseModel):
     access_token: str
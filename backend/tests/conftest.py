@@ -1,32 +1,48 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 from typing import Generator
+import asyncio
+import tempfile
 import sys
 import os
 
 # Agregar el directorio raíz del proyecto al path de Python para poder importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.database import Base, get_db
+# Configuración de la base de datos de prueba (SQLite en un archivo temporal).
+# La aplicación usa el motor asíncrono (aiosqlite) y los fixtures el síncrono,
+# por eso ambos deben apuntar al mismo archivo en lugar de a ":memory:".
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
+
+from db.database import Base, get_db, get_async_url
 from main import app
 from routers.auth import create_access_token, get_password_hash
+from routers.users import principal_cache
+from routers.products import product_cache
+from core.ratelimit import ip_limiter, email_limiter
 from models.models import User, Product
 from uuid import uuid4
 
-# Configuración de la base de datos de prueba (SQLite en memoria)
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Cada TestClient corre su propio event loop, así que no se reutilizan conexiones
+async_engine = create_async_engine(get_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 @pytest.fixture(scope="function")
 def db():
     """
@@ -42,8 +58,20 @@ def db():
     finally:
         db.close()
         
-    # Limpiar las tablas después de cada prueba
+    # Limpiar las tablas y las cachés después de cada prueba
     Base.metadata.drop_all(bind=engine)
+    principal_cache.clear()
+    asyncio.run(product_cache.clear())
+    ip_limiter.clear()
+    email_limiter.clear()
+
+
+@pytest.fixture(scope="function")
+def async_sessions(db):
+    """
+    Fábrica de sesiones asíncronas sobre la base de datos de prueba
+    """
+    return TestingAsyncSessionLocal
 
 
 @pytest.fixture(scope="function")
@@ -51,11 +79,9 @@ def client(db) -> Generator:
     """
     Fixture que crea un cliente de prueba para la aplicación FastAPI
     """
-    def _get_test_db():
-        try:
-            yield db
-        finally:
-            pass
+    async def _get_test_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
     
     app.dependency_overrides[get_db] = _get_test_db
     with TestClient(app) as client:
@@ -77,6 +103,8 @@ def test_user(db) -> User:
     db.add(user)
     db.commit()
     db.refresh(user)
+    # Desacoplar de la sesión para que las consultas de los tests lean lo que escribió la API
+    db.expunge(user)
     return user
 
 
@@ -111,4 +139,5 @@ def test_product(db, test_user) -> Product:
     db.add(product)
     db.commit()
     db.refresh(product)
+    db.expunge(product)
     return product
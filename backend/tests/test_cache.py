@@ -0,0 +1,61 @@
+import asyncio
+import time
+from core.cache import TTLCache, create_response_cache
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Prueba que la caché LRU descarta la entrada menos usada"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_cache_expires_entries():
+    """Prueba que las entradas expiran tras el TTL"""
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+def test_response_cache_drops_reads_that_raced_a_write():
+    """Prueba que una lectura iniciada antes de una invalidación no guarda datos viejos"""
+    cache = create_response_cache("memory")
+
+    async def scenario():
+        token = cache.token()
+        await cache.invalidate(keys=["product:1"])
+        assert not await cache.set("product:1", {"ETag": '"old"'}, b"{}", token)
+        assert await cache.get("product:1") is None
+
+        token = cache.token()
+        assert await cache.set("product:1", {"ETag": '"new"'}, b"{}", token)
+        headers, body = await cache.get("product:1")
+        assert headers["ETag"] == '"new"'
+
+    asyncio.run(scenario())
+
+def test_replica_reads_are_not_cached(client, auth_headers, test_product):
+    """Prueba que las respuestas leídas de una réplica no se guardan en la caché compartida"""
+    from db.database import get_db
+    from main import app
+    from routers.products import product_cache
+    primary = app.dependency_overrides[get_db]
+
+    async def replica_db():
+        async for session in primary():
+            # Lo que RoutingSession anota cuando la sesión lee de una réplica
+            session.info["replica_engine"] = "replica0"
+            yield session
+
+    app.dependency_overrides[get_db] = replica_db
+    try:
+        assert client.get(f"/api/products/{test_product.id}", headers=auth_headers).status_code == 200
+        assert client.get("/api/products/", headers=auth_headers).status_code == 200
+        assert product_cache.stats()["size"] == 0
+    finally:
+        app.dependency_overrides[get_db] = primary
+    client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    assert product_cache.stats()["size"] == 1
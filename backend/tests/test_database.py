@@ -0,0 +1,238 @@
+import asyncio
+from itertools import cycle
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from uuid import uuid4
+
+from core import metrics
+from db.database import Base, RoutingSession, TimedQueuePool, engine_options, recent_writers
+from models.models import User
+
+
+@pytest.fixture
+def routed(tmp_path):
+    """Primario y réplica como dos bases SQLite distintas, para saber quién responde"""
+    urls = {name: f"sqlite:///{tmp_path / name}.db" for name in ("primary", "replica")}
+    for name, url in urls.items():
+        sync = create_engine(url)
+        Base.metadata.create_all(bind=sync)
+        with sync.begin() as conn:
+            # La réplica tiene 3 usuarios y el primario 1
+            for i in range(1 if name == "primary" else 3):
+                conn.execute(User.__table__.insert(), {"id": str(uuid4()), "name": "U", "email": f"{name}{i}@example.com"})
+        sync.dispose()
+
+    primary = create_async_engine(urls["primary"].replace("sqlite", "sqlite+aiosqlite"))
+    replica = create_async_engine(urls["replica"].replace("sqlite", "sqlite+aiosqlite"))
+
+    class TestRoutingSession(RoutingSession):
+        pass
+    TestRoutingSession.primary = primary
+    TestRoutingSession.replicas = [replica]
+    TestRoutingSession._replica_cycle = cycle([replica])
+
+    yield async_sessionmaker(class_=AsyncSession, sync_session_class=TestRoutingSession, expire_on_commit=False)
+    recent_writers.clear()
+    asyncio.run(primary.dispose())
+    asyncio.run(replica.dispose())
+
+async def _count_users(session) -> int:
+    return await session.scalar(select(func.count()).select_from(User))
+
+def test_reads_go_to_replica(routed):
+    """Prueba que las sesiones de lectura leen de la réplica y las demás del primario"""
+    async def run():
+        async with routed(info={"replica": True}) as session:
+            assert await _count_users(session) == 3
+        async with routed(info={"replica": False}) as session:
+            assert await _count_users(session) == 1
+    asyncio.run(run())
+
+def test_session_sticks_to_primary_after_write(routed):
+    """Prueba que tras escribir la sesión sigue leyendo del primario"""
+    async def run():
+        async with routed(info={"replica": True}) as session:
+            session.add(User(id=str(uuid4()), name="New", email="new@example.com"))
+            await session.commit()
+            assert await _count_users(session) == 2  # primario: 1 + el nuevo
+    asyncio.run(run())
+
+def test_user_sticks_to_primary_after_write(routed):
+    """Prueba read-your-writes entre sesiones del mismo usuario"""
+    async def run():
+        async with routed(info={"replica": False, "user_id": "writer"}) as session:
+            session.add(User(id=str(uuid4()), name="New", email="new@example.com"))
+            await session.commit()
+        async with routed(info={"replica": True, "user_id": "writer"}) as session:
+            assert await _count_users(session) == 2  # primario
+        async with routed(info={"replica": True, "user_id": "someone-else"}) as session:
+            assert await _count_users(session) == 3  # réplica
+    asyncio.run(run())
+
+def test_pool_checkout_wait_is_recorded(tmp_path):
+    """Prueba que el pool registra el tiempo de espera de cada checkout"""
+    async def run():
+        pool_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+                                          poolclass=TimedQueuePool, pool_size=1, max_overflow=0)
+        before = metrics.db_pool_checkout_wait.count("primary")
+        async with pool_engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+        await pool_engine.dispose()
+        return metrics.db_pool_checkout_wait.count("primary") - before
+    assert asyncio.run(run()) == 1
+
+def test_engine_options():
+    """Prueba que la configuración del pool solo se aplica fuera de SQLite"""
+    assert "pool_size" not in engine_options("sqlite:///test.db")
+    options = engine_options("postgresql://user:pass@db/products", "replica0")
+    assert options["poolclass"].label == "replica0"
+    assert issubclass(options["poolclass"], TimedQueuePool)
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_pre_ping", "pool_recycle"} <= options.keys()
+
+def test_bootstrap_creates_schema(db):
+    """Prueba que el comando de bootstrap crea las tablas que la app ya no crea al arrancar"""
+    from sqlalchemy import inspect
+    from db import bootstrap
+    bind = db.get_bind()
+    Base.metadata.drop_all(bind=bind)
+    assert not inspect(bind).has_table("products")
+    asyncio.run(bootstrap.main())
+    assert {"users", "products"} <= set(inspect(bind).get_table_names())
+
+def test_bootstrap_adds_missing_indexes(db):
+    """Prueba que el bootstrap crea los índices nuevos en tablas ya existentes"""
+    from sqlalchemy import inspect
+    from db import bootstrap
+    bind = db.get_bind()
+    with bind.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_products_price_id")
+    asyncio.run(bootstrap.main())
+    assert "ix_products_price_id" in {index["name"] for index in inspect(bind).get_indexes("products")}
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id VARCHAR NOT NULL PRIMARY KEY, name VARCHAR, email VARCHAR, password VARCHAR, "
+    "is_active BOOLEAN, created_at DATETIME, updated_at DATETIME)",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE INDEX ix_users_id ON users (id)",
+    "CREATE TABLE products (id VARCHAR NOT NULL PRIMARY KEY, name VARCHAR, description TEXT, price FLOAT, "
+    "user_id VARCHAR REFERENCES users (id), created_at DATETIME, updated_at DATETIME)",
+    "CREATE INDEX ix_products_id ON products (id)",
+    "CREATE INDEX ix_products_user_id_created_at_id ON products (user_id, created_at, id)",
+]
+
+def test_migrate_text_ids(tmp_path):
+    """Prueba que la migración convierte los ids de texto en UUID de 16 bytes sin cambiar su valor"""
+    from sqlalchemy import inspect
+    from db.migrate_ids import migrate_ids, needs_migration
+    from db.search import ensure_search_index
+    from models.models import Product
+    user_id, product_id = str(uuid4()), str(uuid4())
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+        ensure_search_index(conn)
+        conn.exec_driver_sql("INSERT INTO users VALUES (?, 'U', 'u@example.com', 'x', 1, "
+                             "'2024-01-01 00:00:00.000000', '2024-01-01 00:00:00.000000')", (user_id,))
+        conn.exec_driver_sql("INSERT INTO products VALUES (?, 'Walnut desk', 'Solid', 10.0, ?, "
+                             "'2024-01-01 00:00:00.000000', '2024-01-01 00:00:00.000000')", (product_id, user_id))
+
+    with legacy.begin() as conn:
+        assert needs_migration(conn)
+        assert migrate_ids(conn)
+        assert not migrate_ids(conn)
+    with legacy.connect() as conn:
+        assert conn.execute(select(Product.id, Product.user_id)).one() == (product_id, user_id)
+        assert conn.exec_driver_sql("SELECT typeof(id), length(id) FROM products").one() == ("blob", 16)
+        assert conn.exec_driver_sql("SELECT count(*) FROM products_fts WHERE products_fts MATCH 'walnut'").scalar() == 1
+        indexes = {index["name"] for index in inspect(conn).get_indexes("products")}
+        assert "ix_products_price_id" in indexes
+    legacy.dispose()
+
+def test_bootstrap_migrates_text_ids(db):
+    """Prueba que el bootstrap convierte los ids de texto antes de crear el esquema"""
+    from db import bootstrap
+    from models.models import Product
+    user_id, product_id = str(uuid4()), str(uuid4())
+    bind = db.get_bind()
+    Base.metadata.drop_all(bind=bind)
+    with bind.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO users (id, email) VALUES (?, 'u@example.com')", (user_id,))
+        conn.exec_driver_sql("INSERT INTO products (id, name, user_id) VALUES (?, 'Walnut desk', ?)",
+                             (product_id, user_id))
+    asyncio.run(bootstrap.main())
+    with bind.connect() as conn:
+        assert conn.execute(select(Product.id, Product.user_id)).one() == (product_id, user_id)
+        assert conn.exec_driver_sql("SELECT typeof(id) FROM users").scalar() == "blob"
+
+def test_migrate_rejects_malformed_ids(tmp_path):
+    """Prueba que un id que no es UUID aborta la migración sin cambiar nada"""
+    from db.migrate_ids import migrate_ids, needs_migration
+    legacy = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("INSERT INTO users (id, email) VALUES ('not-a-uuid', 'u@example.com')")
+    with pytest.raises(Exception, match="not-a-uuid"):
+        with legacy.begin() as conn:
+            migrate_ids(conn)
+    with legacy.connect() as conn:
+        assert needs_migration(conn)
+        assert conn.exec_driver_sql("SELECT id FROM users").scalar() == "not-a-uuid"
+    legacy.dispose()
+
+def test_search_index_survives_vacuum(tmp_path):
+    """Prueba que la búsqueda sigue devolviendo el producto correcto después de un VACUUM"""
+    from db.search import search_products
+    from models.models import Product
+    sync = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(bind=sync)
+    user_id = str(uuid4())
+    ids = {name: str(uuid4()) for name in ("Oak table", "Walnut desk", "Pine shelf")}
+    with sync.begin() as conn:
+        conn.execute(User.__table__.insert(), {"id": user_id, "name": "U", "email": "u@example.com"})
+        conn.execute(Product.__table__.insert(), [
+            {"id": product_id, "name": name, "description": name, "price": 1.0, "user_id": user_id}
+            for name, product_id in ids.items()
+        ])
+        conn.execute(Product.__table__.delete().where(Product.id == ids["Oak table"]))
+        # What VACUUM may do to a table without INTEGER PRIMARY KEY
+        conn.exec_driver_sql("UPDATE products SET rowid = 4 - rowid")
+    with sync.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM")
+    sync.dispose()
+
+    async def search(q):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'search.db'}")
+        async with AsyncSession(engine) as session:
+            rows = await search_products(session, q, columns=[Product.id, Product.name])
+        await engine.dispose()
+        return [tuple(row) for row in rows]
+
+    assert asyncio.run(search("walnut")) == [(ids["Walnut desk"], "Walnut desk")]
+    assert asyncio.run(search("pine")) == [(ids["Pine shelf"], "Pine shelf")]
+    assert asyncio.run(search("oak")) == []
+
+def test_search_index_replaces_rowid_layout(tmp_path):
+    """Prueba que ensure_search_index reemplaza el índice antiguo ligado al rowid"""
+    from db.search import ensure_search_index
+    from models.models import Product
+    sync = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    with sync.begin() as conn:
+        Product.__table__.create(conn)
+        # ensure_search_index ran on create: swap it for the old layout
+        for statement in ("DROP TRIGGER products_fts_ai", "DROP TABLE products_fts",
+                          "DROP VIEW products_fts_content", "DROP TABLE products_fts_ids"):
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE products_fts USING fts5("
+                             "name, description, content='products', content_rowid='rowid')")
+        conn.execute(Product.__table__.insert(), {"id": str(uuid4()), "name": "Walnut desk",
+                                                   "description": "Solid", "price": 1.0, "user_id": str(uuid4())})
+        ensure_search_index(conn)
+        assert conn.exec_driver_sql(
+            "SELECT count(*) FROM products_fts WHERE products_fts MATCH 'walnut'").scalar() == 1
+        assert conn.exec_driver_sql("SELECT count(*) FROM products_fts_ids").scalar() == 1
+    sync.dispose()
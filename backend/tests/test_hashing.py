@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from core.hashing import HashingExecutor, HashingQueueFull, hasher, get_password_hash, verify_password
+
+def test_hashing_executor_roundtrip():
+    """Prueba que el pool produce hashes verificables"""
+    executor = HashingExecutor(max_workers=1, queue_limit=1, kind="thread")
+    try:
+        hashed = asyncio.run(executor.run(get_password_hash, "Secret123!"))
+        assert asyncio.run(executor.run(verify_password, "Secret123!", hashed))
+        stats = executor.stats()
+        assert stats["completed"] == 2
+        assert stats["queue_depth"] == 0
+    finally:
+        executor.shutdown()
+
+def test_hashing_executor_rejects_when_queue_full():
+    """Prueba que el pool rechaza trabajos cuando la cola está llena"""
+    executor = HashingExecutor(max_workers=1, queue_limit=1, kind="thread")
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        assert executor.queue_depth == 1
+        with pytest.raises(HashingQueueFull):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(running, queued)
+
+    try:
+        asyncio.run(scenario())
+        assert executor.stats()["rejected"] == 1
+        assert executor.stats()["completed"] == 2
+    finally:
+        executor.shutdown()
+
+def test_login_uses_hashing_pool(client: TestClient, test_user):
+    """Prueba que el login verifica la contraseña en el pool de hashing"""
+    completed = hasher.stats()["completed"]
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "test@example.com", "password": "Test1234!"}
+    )
+    assert response.status_code == 200
+    assert hasher.stats()["completed"] == completed + 1
+
+def test_hashing_executor_recovers_from_dead_worker():
+    """Prueba que el pool se recrea cuando un proceso de hashing muere"""
+    executor = HashingExecutor(max_workers=1, queue_limit=1, kind="process")
+    try:
+        assert asyncio.run(executor.run(pow, 2, 10)) == 1024
+        for process in list(executor._executor._processes.values()):
+            process.kill()
+            process.join()
+        assert asyncio.run(executor.run(pow, 2, 11)) == 2048
+        assert executor.stats()["restarts"] == 1
+    finally:
+        executor.shutdown()
@@ -24,3 +24,30 @@ def test_health_check_unauthenticated(client: TestClient):
     """Prueba que el health check requiere autenticación"""
     response = client.get("/api/health")
     assert response.status_code == 401
+
+def test_liveness(client: TestClient):
+    """Prueba el endpoint de liveness"""
+    response = client.get("/api/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "alive"
+
+def test_readiness(client: TestClient):
+    """Prueba que el endpoint de readiness refleja la muestra de la base de datos"""
+    import time
+    from routers.health import sampler
+    # Esperar a la primera muestra del sampler en segundo plano
+    for _ in range(50):
+        if sampler.latest() is not None:
+            break
+        time.sleep(0.05)
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+def test_health_report_has_uptime_and_history(client: TestClient):
+    """Prueba que el reporte detallado incluye uptime real e historial"""
+    response = client.get("/api/health")
+    data = response.json()
+    assert data["database"]["status"] == "healthy"
+    assert data["application"]["uptime_seconds"] >= 0
+    assert len(data["history"]) >= 1
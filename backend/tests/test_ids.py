@@ -0,0 +1,21 @@
+from uuid import UUID
+
+from core.ids import new_id, parse_id, uuid7
+
+
+def test_uuid7_is_time_ordered():
+    """Prueba que los UUIDv7 generados seguidos son únicos y crecientes"""
+    ids = [uuid7() for _ in range(10000)]
+    assert all(value.version == 7 and value.variant == "specified in RFC 4122" for value in ids)
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    # El orden de los bytes (el del índice) es el mismo que el de creación
+    assert [value.bytes for value in ids] == sorted(value.bytes for value in ids)
+
+def test_parse_id():
+    """Prueba que parse_id normaliza UUID válidos y rechaza el resto"""
+    value = new_id()
+    assert parse_id(value.upper()) == value
+    assert parse_id(UUID(value)) == value
+    assert parse_id(value.replace("-", "")) == value
+    for bad in ("not-a-uuid", "", None, 42):
+        assert parse_id(bad) is None
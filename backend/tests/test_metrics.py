@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from core.metrics import Registry, http_requests, db_statements
+
+
+def test_metrics_endpoint(client: TestClient, test_product, auth_headers):
+    """Prueba que /metrics expone las métricas en formato Prometheus"""
+    client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE http_requests_total counter" in body
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert "# TYPE db_statements_total counter" in body
+    assert "password_hashing{" in body
+
+def test_metrics_use_route_template(client: TestClient, test_product, auth_headers):
+    """Prueba que las peticiones se etiquetan con la plantilla de la ruta y el código de estado"""
+    route = "/api/products/{product_id}"
+    before = http_requests.value("GET", route, "200")
+    client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    client.get("/api/products/non-existent-id", headers=auth_headers)
+    assert http_requests.value("GET", route, "200") == before + 1
+    assert http_requests.value("GET", route, "404") >= 1
+    assert f'route="/api/products/{test_product.id}"' not in client.get("/metrics").text
+
+def test_metrics_count_statements():
+    """Prueba que se cuentan las sentencias SQL del motor de la aplicación"""
+    # Las sesiones de los tests usan otro motor: consultar con el instrumentado
+    from db.database import SessionLocal, engine
+    before = db_statements.value("SELECT")
+
+    async def query():
+        async with SessionLocal() as session:
+            await session.execute(text("SELECT 1"))
+        # Sin conexiones atadas a este event loop en el pool
+        await engine.dispose()
+
+    asyncio.run(query())
+    assert db_statements.value("SELECT") == before + 1
+
+def test_histogram_rendering():
+    """Prueba que los histogramas se exponen con buckets acumulativos"""
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.1, "/a")
+    histogram.observe(3.0, "/a")
+    body = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in body
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 2' in body
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in body
+    assert 'latency_seconds_count{route="/a"} 3' in body
@@ -3,6 +3,13 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from models.models import Product
 
+# Ids de filas creadas a mano en los tests (los ids son UUID)
+OTHER_PRODUCT_ID = "00000000-0000-7000-8000-0000000000a1"
+ANOTHER_USER_ID = "00000000-0000-7000-8000-0000000000b1"
+
+def _id(n: int) -> str:
+    return f"00000000-0000-7000-8000-{n:012d}"
+
 def test_create_product(client: TestClient, auth_headers):
     """Prueba crear un nuevo producto"""
     response = client.post(
@@ -100,11 +107,11 @@ def test_update_another_users_product(client: TestClient, db, auth_headers):
     """Prueba actualizar un producto que pertenece a otro usuario"""
     # Crear producto para otro usuario
     other_product = Product(
-        id="other-product-id",
+        id=OTHER_PRODUCT_ID,
         name="Other User Product",
         description="This product belongs to another user",
         price=50.00,
-        user_id="another-user-id"
+        user_id=ANOTHER_USER_ID
     )
     db.add(other_product)
     db.commit()
@@ -129,14 +136,404 @@ def test_delete_another_users_product(client: TestClient, db, auth_headers):
     """Prueba eliminar un producto que pertenece a otro usuario"""
     # Crear producto para otro usuario
     other_product = Product(
-        id="other-product-id",
+        id=OTHER_PRODUCT_ID,
         name="Other User Product",
         description="This product belongs to another user",
         price=50.00,
-        user_id="another-user-id"
+        user_id=ANOTHER_USER_ID
     )
     db.add(other_product)
     db.commit()
     
     response = client.delete(f"/api/products/{other_product.id}", headers=auth_headers)
     assert response.status_code == 403  # Forbidden
+
+def test_write_missing_product(client: TestClient, auth_headers, test_product):
+    """Prueba que actualizar o borrar un producto inexistente da 404 y no toca los demás"""
+    assert client.put("/api/products/missing", json={"price": 1}, headers=auth_headers).status_code == 404
+    assert client.delete("/api/products/missing", headers=auth_headers).status_code == 404
+    assert client.get(f"/api/products/{test_product.id}", headers=auth_headers).json()["price"] == 99.99
+
+def test_product_ids(client: TestClient, auth_headers, test_product):
+    """Prueba que los ids nuevos son UUIDv7 y que los ids mal formados no llegan a la base de datos"""
+    from uuid import UUID
+    created = client.post("/api/products/", json={"name": "V7", "description": "V7", "price": 1},
+                          headers=auth_headers).json()
+    assert UUID(created["id"]).version == 7
+    assert client.get(f"/api/products/{created['id'].upper()}", headers=auth_headers).json()["id"] == created["id"]
+    assert client.get("/api/products/not-a-uuid", headers=auth_headers).status_code == 404
+    assert client.get("/api/products/?user_id=not-a-uuid", headers=auth_headers).json() == []
+    assert client.get("/api/products/?cursor=" + "Y3JlYXRlZF9hdHwyMDI0LTAxLTAxfG5vcGU", headers=auth_headers).status_code == 400
+    response = client.post("/api/products/bulk/delete", json={"ids": ["not-a-uuid"]}, headers=auth_headers)
+    assert response.json()["results"][0]["status"] == 404
+    from routers.auth import create_access_token
+    bad_token = {"Authorization": f"Bearer {create_access_token({'sub': 'not-a-uuid'})}"}
+    assert client.get("/api/products/", headers=bad_token).status_code == 401
+
+def test_update_product_returns_new_version(client: TestClient, auth_headers, test_product):
+    """Prueba que la respuesta del UPDATE ... RETURNING trae la nueva fecha de modificación"""
+    before = client.get(f"/api/products/{test_product.id}", headers=auth_headers).json()
+    after = client.put(f"/api/products/{test_product.id}", json={"price": 5}, headers=auth_headers).json()
+    assert after["price"] == 5 and after["updated_at"] > before["updated_at"]
+    assert client.get(f"/api/products/{test_product.id}", headers=auth_headers).json() == after
+    # Sin campos no se escribe nada
+    unchanged = client.put(f"/api/products/{test_product.id}", json={}, headers=auth_headers).json()
+    assert unchanged == after
+
+def _create_products(db, user_id, count):
+    from datetime import datetime, timedelta
+    base = datetime(2024, 1, 1)
+    for i in range(count):
+        db.add(Product(
+            id=_id(i),
+            name=f"Product {i}",
+            description="Paginated product",
+            price=10 + i,
+            user_id=user_id,
+            created_at=base + timedelta(minutes=i),
+        ))
+    db.commit()
+
+def test_read_products_cursor_pagination(client: TestClient, db, auth_headers, test_user):
+    """Prueba recorrer la lista de productos con cursores"""
+    _create_products(db, test_user.id, 5)
+    names = []
+    params = {"limit": 2}
+    while True:
+        response = client.get("/api/products/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        names += [p["name"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "cursor": cursor}
+    assert names == [f"Product {i}" for i in range(5)]
+
+def test_read_products_skip_limit_still_supported(client: TestClient, db, auth_headers, test_user):
+    """Prueba que la paginación con skip/limit sigue funcionando"""
+    _create_products(db, test_user.id, 5)
+    response = client.get("/api/products/?skip=3&limit=10", headers=auth_headers)
+    assert response.status_code == 200
+    assert [p["name"] for p in response.json()] == ["Product 3", "Product 4"]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_read_user_products_is_paginated(client: TestClient, db, auth_headers, test_user):
+    """Prueba que los productos del usuario se devuelven por páginas"""
+    _create_products(db, test_user.id, 3)
+    response = client.get("/api/products/user?limit=2", headers=auth_headers)
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/api/products/user?limit=2&cursor={cursor}", headers=auth_headers)
+    assert [p["name"] for p in response.json()] == ["Product 2"]
+
+def test_read_products_filtered_and_sorted(client: TestClient, db, auth_headers, test_user):
+    """Prueba los filtros de precio, dueño y fecha con orden descendente por cursores"""
+    _create_products(db, test_user.id, 6)  # precios 10..15
+    db.add(Product(id=OTHER_PRODUCT_ID, name="Other", description="D", price=12.5, user_id=ANOTHER_USER_ID))
+    db.commit()
+    names, params = [], {"min_price": 11, "max_price": 14, "sort": "-price", "limit": 2}
+    while True:
+        response = client.get("/api/products/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        names += [p["name"] for p in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert names == ["Product 4", "Product 3", "Other", "Product 2", "Product 1"]
+
+    response = client.get("/api/products/", headers=auth_headers, params={
+        "user_id": test_user.id, "created_after": "2024-01-01T00:02:00Z", "created_before": "2024-01-01T00:04:00",
+    })
+    assert [p["name"] for p in response.json()] == ["Product 2", "Product 3"]
+
+def test_read_products_sort_is_whitelisted(client: TestClient, db, auth_headers, test_user):
+    """Prueba que solo se aceptan claves de orden conocidas y cursores del mismo orden"""
+    assert client.get("/api/products/?sort=name", headers=auth_headers).status_code == 422
+    _create_products(db, test_user.id, 3)
+    cursor = client.get("/api/products/?limit=1&sort=price", headers=auth_headers).headers["X-Next-Cursor"]
+    response = client.get(f"/api/products/?limit=1&sort=created_at&cursor={cursor}", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_read_products_sparse_fields(client: TestClient, auth_headers, test_product):
+    """Prueba que los listados omiten la descripción por defecto y respetan fields="""
+    compact = client.get("/api/products/", headers=auth_headers).json()
+    assert "description" not in compact[0] and compact[0]["name"] == "Test Product"
+    full = client.get("/api/products/user?fields=name,description,price,id,user_id,created_at,updated_at",
+                      headers=auth_headers).json()
+    assert full[0]["description"] == "This is a test product"
+
+    response = client.get("/api/products/?fields=price,name&sort=-price", headers=auth_headers)
+    assert list(response.json()[0]) == ["name", "price"]
+    assert client.get("/api/products/search?q=test&fields=id", headers=auth_headers).json() == [{"id": test_product.id}]
+    # Cada proyección tiene su propio ETag
+    etag = response.headers["ETag"]
+    assert client.get("/api/products/", headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+    for bad in ("password", "name,secret", ","):
+        assert client.get(f"/api/products/?fields={bad}", headers=auth_headers).status_code == 400
+
+def test_list_schema_matches_sparse_fields(client: TestClient):
+    """Prueba que el esquema OpenAPI de los listados no exige campos que fields= puede omitir"""
+    schema = client.get("/openapi.json").json()
+    for path in ("/api/products/", "/api/products/user", "/api/products/search"):
+        items = schema["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]["items"]
+        assert items["$ref"].endswith("/ProductListItem")
+    assert "required" not in schema["components"]["schemas"]["ProductListItem"]
+
+def test_read_product_sparse_fields(client: TestClient, auth_headers, test_product):
+    """Prueba fields= en el detalle, con validadores propios y sin tocar la caché"""
+    url = f"/api/products/{test_product.id}"
+    full = client.get(url, headers=auth_headers)
+    sparse = client.get(f"{url}?fields=price", headers=auth_headers)
+    assert sparse.json() == {"price": test_product.price}
+    assert sparse.headers["ETag"] != full.headers["ETag"]
+    response = client.get(f"{url}?fields=price", headers={**auth_headers, "If-None-Match": sparse.headers["ETag"]})
+    assert response.status_code == 304
+    assert client.get(url, headers=auth_headers).json() == full.json()
+    assert client.get(f"{url}?fields=owner", headers=auth_headers).status_code == 400
+
+def test_filter_combinations_use_indexes(db):
+    """Prueba con EXPLAIN que cada combinación de filtros y orden usa un índice"""
+    from benchmarks.explain_filters import explain_all
+    with db.get_bind().connect() as conn:
+        checked, failures = explain_all(conn)
+    assert checked == 192
+    assert failures == []
+
+def test_read_products_invalid_cursor(client: TestClient, auth_headers):
+    """Prueba que un cursor inválido devuelve 400"""
+    response = client.get("/api/products/?cursor=not-a-cursor", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_search_products(client: TestClient, db, auth_headers, test_user):
+    """Prueba la búsqueda de texto completo ordenada por relevancia"""
+    db.add_all([
+        Product(id=_id(101), name="Desk lamp", description="Pairs well with a wooden keyboard", price=20, user_id=test_user.id),
+        Product(id=_id(102), name="Mechanical keyboard", description="Tactile switches", price=80, user_id=test_user.id),
+        Product(id=_id(103), name="Coffee mug", description="Ceramic", price=5, user_id=test_user.id),
+    ])
+    db.commit()
+    response = client.get("/api/products/search?q=keyboard", headers=auth_headers)
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == [_id(102), _id(101)]
+
+def test_search_follows_updates_and_deletes(client: TestClient, auth_headers, test_product):
+    """Prueba que el índice de búsqueda se mantiene al actualizar y eliminar"""
+    client.put(f"/api/products/{test_product.id}", json={"name": "Vintage guitar"}, headers=auth_headers)
+    assert len(client.get("/api/products/search?q=guitar", headers=auth_headers).json()) == 1
+
+    client.delete(f"/api/products/{test_product.id}", headers=auth_headers)
+    assert client.get("/api/products/search?q=guitar", headers=auth_headers).json() == []
+
+def test_search_ignores_query_syntax(client: TestClient, auth_headers, test_product):
+    """Prueba que caracteres especiales en la consulta no producen errores"""
+    response = client.get('/api/products/search?q="test* (product:', headers=auth_headers)
+    assert response.status_code == 200
+    assert [p["id"] for p in response.json()] == [test_product.id]
+
+def test_bulk_create_products(client: TestClient, db, auth_headers, test_user):
+    """Prueba crear varios productos en una sola petición"""
+    response = client.post(
+        "/api/products/bulk",
+        json={"items": [
+            {"name": "Bulk 1", "description": "First", "price": 1.5},
+            {"name": "Bulk 2", "description": "Invalid price", "price": -1},
+            {"name": "Bulk 3", "description": "Third", "price": 3},
+        ]},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 1
+    assert [r["status"] for r in data["results"]] == [201, 422, 201]
+    assert db.query(Product).filter(Product.user_id == test_user.id).count() == 2
+
+def test_bulk_update_products(client: TestClient, db, auth_headers, test_product):
+    """Prueba actualizar varios productos con un estado por elemento"""
+    db.add(Product(id=OTHER_PRODUCT_ID, name="Other", description="Other", price=5, user_id=ANOTHER_USER_ID))
+    db.commit()
+    response = client.put(
+        "/api/products/bulk",
+        json={"items": [
+            {"id": test_product.id, "price": 10},
+            {"id": OTHER_PRODUCT_ID, "price": 1},
+            {"id": "missing-id", "name": "Nope"},
+            {"id": 5, "price": 1},
+        ]},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == [200, 403, 404, 422]
+    assert response.json()["results"][3]["id"] is None
+    assert db.query(Product).filter(Product.id == test_product.id).first().price == 10
+    assert db.query(Product).filter(Product.id == OTHER_PRODUCT_ID).first().price == 5
+
+def test_bulk_update_without_changes(client: TestClient, db, auth_headers, test_product):
+    """Prueba que un elemento sin campos que cambiar responde 200 sin tocar updated_at"""
+    before = client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    response = client.put("/api/products/bulk", json={"items": [{"id": test_product.id}]}, headers=auth_headers)
+    assert [r["status"] for r in response.json()["results"]] == [200]
+    after = client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    assert after.headers["ETag"] == before.headers["ETag"]
+    assert after.json()["updated_at"] == before.json()["updated_at"]
+
+def test_bulk_delete_products(client: TestClient, db, auth_headers, test_product):
+    """Prueba eliminar varios productos respetando la propiedad"""
+    db.add(Product(id=OTHER_PRODUCT_ID, name="Other", description="Other", price=5, user_id=ANOTHER_USER_ID))
+    db.commit()
+    response = client.post(
+        "/api/products/bulk/delete",
+        json={"ids": [test_product.id, OTHER_PRODUCT_ID, test_product.id]},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == [204, 403, 409]
+    assert db.query(Product).filter(Product.id == test_product.id).first() is None
+    assert db.query(Product).filter(Product.id == OTHER_PRODUCT_ID).first() is not None
+
+def test_bulk_request_too_large(client: TestClient, auth_headers):
+    """Prueba que se rechazan lotes por encima del máximo"""
+    from schemas.schemas import BULK_MAX_ITEMS
+    response = client.post("/api/products/bulk/delete", json={"ids": ["x"] * (BULK_MAX_ITEMS + 1)}, headers=auth_headers)
+    assert response.status_code == 422
+
+def test_export_products_ndjson(client: TestClient, db, auth_headers, test_user):
+    """Prueba exportar el catálogo en formato NDJSON"""
+    import json
+    _create_products(db, test_user.id, 3)
+    db.add(Product(id=OTHER_PRODUCT_ID, name="Other", description="Other", price=5, user_id=ANOTHER_USER_ID))
+    db.commit()
+    response = client.get("/api/products/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 4
+    assert rows[0]["name"] == "Product 0"
+
+    response = client.get(f"/api/products/export?user_id={test_user.id}", headers=auth_headers)
+    assert len(response.text.splitlines()) == 3
+
+def test_export_products_csv(client: TestClient, auth_headers, test_product):
+    """Prueba exportar el catálogo en formato CSV"""
+    import csv
+    response = client.get("/api/products/export?format=csv", headers=auth_headers)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert len(rows) == 1
+    assert rows[0]["id"] == test_product.id
+    assert float(rows[0]["price"]) == 99.99
+
+def test_import_products_ndjson(client: TestClient, db, auth_headers, test_user):
+    """Prueba importar productos desde NDJSON con errores por fila"""
+    body = "\n".join([
+        '{"name": "Imported 1", "description": "First", "price": 1}',
+        '{"name": "Imported 2", "description": "Bad price", "price": 0}',
+        'not json',
+        '{"name": "Imported 3", "description": "Third", "price": 3}',
+    ])
+    response = client.post("/api/products/import", content=body,
+                           headers={**auth_headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "completed"
+    assert job["rows_processed"] == 4
+    assert job["rows_imported"] == 2
+    assert [error["row"] for error in job["errors"]] == [2, 3]
+    assert db.query(Product).filter(Product.user_id == test_user.id).count() == 2
+
+    # El progreso del trabajo se puede consultar
+    response = client.get(f"/api/products/import/{job['id']}", headers=auth_headers)
+    assert response.json()["rows_imported"] == 2
+
+def test_import_products_csv(client: TestClient, db, auth_headers, test_user):
+    """Prueba importar productos desde CSV, incluidos campos con saltos de línea"""
+    body = 'name,description,price\r\nLamp,"Two\nlines",12.5\r\nDesk,Oak desk,99\r\n'
+    response = client.post("/api/products/import?format=csv", content=body, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["rows_imported"] == 2
+    lamp = db.query(Product).filter(Product.name == "Lamp").first()
+    assert lamp.description == "Two\nlines"
+    assert lamp.price == 12.5
+
+def test_import_products_invalid_body(client: TestClient, auth_headers):
+    """Prueba que un cuerpo que no es UTF-8 devuelve 400 con el estado del trabajo"""
+    response = client.post("/api/products/import?format=csv", content=b"name,description,price\n\xff\xfe,x,1\n",
+                           headers=auth_headers)
+    assert response.status_code == 400
+    job = response.json()["detail"]
+    assert job["status"] == "failed"
+    assert job["finished_at"] is not None
+
+def test_read_other_users_import(client: TestClient, auth_headers):
+    """Prueba que no se puede consultar un trabajo de importación inexistente o ajeno"""
+    response = client.get("/api/products/import/unknown-job", headers=auth_headers)
+    assert response.status_code == 404
+
+def test_read_product_conditional_get(client: TestClient, auth_headers, test_product):
+    """Prueba que un producto sin cambios devuelve 304 con If-None-Match o If-Modified-Since"""
+    response = client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+
+    response = client.get(f"/api/products/{test_product.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    response = client.get(f"/api/products/{test_product.id}", headers={**auth_headers, "If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    # Comparación débil: un proxy que comprime devuelve la ETag como W/"..."
+    response = client.get(f"/api/products/{test_product.id}", headers={**auth_headers, "If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+
+    client.put(f"/api/products/{test_product.id}", json={"price": 1.5}, headers=auth_headers)
+    response = client.get(f"/api/products/{test_product.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_read_products_conditional_get(client: TestClient, auth_headers, test_product):
+    """Prueba que una lista sin cambios devuelve 304 y cambia tras crear un producto"""
+    for url in ("/api/products/", "/api/products/user"):
+        etag = client.get(url, headers=auth_headers).headers["ETag"]
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+    etag = client.get("/api/products/", headers=auth_headers).headers["ETag"]
+    client.post("/api/products/", json={"name": "New", "description": "New", "price": 1}, headers=auth_headers)
+    response = client.get("/api/products/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    etag = response.headers["ETag"]
+    client.delete(f"/api/products/{test_product.id}", headers=auth_headers)
+    response = client.get("/api/products/", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+def test_product_detail_is_cached(client: TestClient, auth_headers, test_product):
+    """Prueba que el detalle se sirve desde la caché y se invalida al actualizar"""
+    from routers.products import product_cache
+    hits = product_cache.hits
+    first = client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    second = client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    assert product_cache.hits == hits + 1
+    assert first.json() == second.json()
+    assert first.headers["ETag"] == second.headers["ETag"]
+
+    client.put(f"/api/products/{test_product.id}", json={"name": "Cached no more"}, headers=auth_headers)
+    assert client.get(f"/api/products/{test_product.id}", headers=auth_headers).json()["name"] == "Cached no more"
+
+    client.delete(f"/api/products/{test_product.id}", headers=auth_headers)
+    assert client.get(f"/api/products/{test_product.id}", headers=auth_headers).status_code == 404
+
+def test_product_lists_are_invalidated_by_writes(client: TestClient, auth_headers, test_product):
+    """Prueba que las listas en caché reflejan las escrituras inmediatamente"""
+    for url in ("/api/products/", "/api/products/user"):
+        assert len(client.get(url, headers=auth_headers).json()) == 1
+    client.post("/api/products/", json={"name": "Fresh", "description": "Fresh", "price": 2}, headers=auth_headers)
+    for url in ("/api/products/", "/api/products/user"):
+        assert len(client.get(url, headers=auth_headers).json()) == 2
+
+    client.post("/api/products/bulk", json={"items": [{"name": "Bulk", "description": "Bulk", "price": 3}]}, headers=auth_headers)
+    assert len(client.get("/api/products/", headers=auth_headers).json()) == 3
+
+    client.post("/api/products/import", content='{"name": "Imp", "description": "Imp", "price": 4}', headers=auth_headers)
+    assert len(client.get("/api/products/user", headers=auth_headers).json()) == 4
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from core import metrics, ratelimit
+from core.hashing import hasher
+from core.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills():
+    """Prueba que el bucket permite la ráfaga, rechaza y se recarga con el tiempo"""
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1.0, burst=2, clock=clock)
+    assert limiter.acquire("ip") == 0
+    assert limiter.acquire("ip") == 0
+    assert limiter.acquire("ip") == pytest.approx(1.0)
+    clock.now = 0.5
+    assert limiter.acquire("ip") == pytest.approx(0.5)
+    clock.now = 1.0
+    assert limiter.acquire("ip") == 0
+    assert limiter.stats()["rejected"] == 2
+
+def test_limiter_memory_is_bounded():
+    """Prueba que el limitador no guarda más claves que su máximo"""
+    limiter = RateLimiter(rate=1.0, burst=1, maxsize=100)
+    for i in range(1000):
+        limiter.acquire(f"10.0.{i // 256}.{i % 256}")
+    assert len(limiter) == 100
+    assert limiter.stats()["evictions"] == 900
+
+def test_login_throttled_per_email(client: TestClient, test_user, monkeypatch):
+    """Prueba que los intentos repetidos contra un email reciben 429 con Retry-After"""
+    monkeypatch.setattr(ratelimit, "email_limiter", RateLimiter(rate=0.01, burst=2))
+    before = metrics.auth_rate_limited.value("login", "email")
+    statuses = [
+        client.post("/api/auth/login", data={"username": "Test@Example.com", "password": "Wrong1234!"}).status_code
+        for _ in range(3)
+    ]
+    assert statuses == [401, 401, 429]
+    response = client.post("/api/auth/login", data={"username": "test@example.com", "password": "Test1234!"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert metrics.auth_rate_limited.value("login", "email") == before + 2
+
+def test_login_shed_when_hashing_saturated(client: TestClient, test_user, monkeypatch):
+    """Prueba que con el pool de hashing saturado el login responde 503 sin encolar"""
+    monkeypatch.setattr(hasher, "_in_flight", hasher.max_workers + hasher.queue_limit)
+    before = metrics.password_hash_rejected.value()
+    response = client.post("/api/auth/login", data={"username": "test@example.com", "password": "Test1234!"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert metrics.password_hash_rejected.value() == before + 1
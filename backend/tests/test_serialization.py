@@ -0,0 +1,57 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from typing import List
+
+from core import serialization
+from core.serialization import PRODUCT_COLUMNS, encode_row, encode_rows
+from models.models import Product
+from schemas.schemas import ProductResponse
+
+_product_list = TypeAdapter(List[ProductResponse])
+
+
+def test_fast_encoding_matches_validated(db, test_product):
+    """Prueba que la codificación rápida produce los mismos bytes que ProductResponse"""
+    db.add(Product(id="00000000-0000-7000-8000-000000000002", name="Ñandú \"quoted\"", description="Línea\nnueva", price=10.5,
+                   user_id=test_product.user_id,
+                   created_at=datetime(2024, 5, 1, 12, 30, 15, 123456),
+                   updated_at=datetime(2024, 5, 1, 12, 30, 15)))
+    db.commit()
+    rows = db.execute(select(*PRODUCT_COLUMNS).order_by(Product.id)).all()
+    assert len(rows) == 2
+    assert encode_rows(rows) == _product_list.dump_json(_product_list.validate_python(rows, from_attributes=True))
+    assert encode_row(rows[0]) == ProductResponse.model_validate(rows[0]).model_dump_json().encode()
+
+def test_stdlib_fallback(db, test_product, monkeypatch):
+    """Prueba que sin orjson se usa json de la biblioteca estándar con el mismo resultado"""
+    rows = db.execute(select(*PRODUCT_COLUMNS)).all()
+    expected = json.loads(encode_rows(rows))
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(encode_rows(rows)) == expected
+    assert encode_rows([]) == b"[]"
+
+def test_validated_mode(client: TestClient, test_product, auth_headers, monkeypatch):
+    """Prueba que FAST_SERIALIZATION=false devuelve la misma respuesta validada"""
+    import routers.products as products
+    fast = client.get(f"/api/products/{test_product.id}", headers=auth_headers).json()
+    # Vaciar la caché para que la segunda lectura vuelva a serializar
+    asyncio.run(products.product_cache.clear())
+    monkeypatch.setattr(products, "FAST_SERIALIZATION", False)
+    validated = client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    assert validated.status_code == 200
+    assert validated.json() == fast
+
+def test_validated_mode_sparse_fields(client: TestClient, test_product, auth_headers, monkeypatch):
+    """Prueba que fields= da el mismo resultado con y sin FAST_SERIALIZATION"""
+    import routers.products as products
+    urls = [f"/api/products/{test_product.id}?fields=name,updated_at", "/api/products/?fields=price,id"]
+    fast = [client.get(url, headers=auth_headers).json() for url in urls]
+    asyncio.run(products.product_cache.clear())
+    monkeypatch.setattr(products, "FAST_SERIALIZATION", False)
+    assert [client.get(url, headers=auth_headers).json() for url in urls] == fast
+    assert list(fast[0]) == ["name", "updated_at"]
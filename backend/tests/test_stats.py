@@ -0,0 +1,96 @@
+import asyncio
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+
+from core import stats
+from core.stats import summarize
+from models.models import Product
+from uuid import uuid4
+
+OTHER_SELLER = "00000000-0000-7000-8000-0000000000c1"
+PRICES = [5.0, 1.0, 3.0, 2.0, 4.0, 10.0, 7.5, 6.0]
+
+
+def _add_products(db, user_id, prices):
+    for price in prices:
+        db.add(Product(id=str(uuid4()), name="P", description="D", price=price, user_id=user_id))
+    db.commit()
+
+def test_summarize_without_numpy(monkeypatch):
+    """Prueba que el cálculo en Python puro da los mismos números que NumPy"""
+    vectorized = summarize(stats._as_array(PRICES), bins=4)
+    assert vectorized["count"] == 8
+    assert vectorized["price"]["min"] == 1.0 and vectorized["price"]["max"] == 10.0
+    assert vectorized["price"]["percentiles"]["p50"] == 4.5
+    assert sum(vectorized["histogram"]["counts"]) == 8
+    monkeypatch.setattr(stats, "_numpy", False)
+    assert summarize(stats._as_array(PRICES), bins=4) == vectorized
+    assert summarize(stats._as_array([]))["count"] == 0
+
+def test_stats_global_and_per_user(db, test_user, test_product, client: TestClient, auth_headers):
+    """Prueba las estadísticas globales y por vendedor cargadas al arrancar"""
+    _add_products(db, OTHER_SELLER, PRICES)
+    # Los productos se insertaron después de arrancar: forzar una recarga completa
+    client.portal.call(_reload)
+
+    everything = client.get("/api/products/stats", headers=auth_headers).json()
+    assert everything["scope"] == "global"
+    assert everything["count"] == len(PRICES) + 1
+
+    seller = client.get(f"/api/products/stats?user_id={OTHER_SELLER}", headers=auth_headers).json()
+    assert seller["count"] == len(PRICES)
+    assert seller["price"]["avg"] == pytest.approx(sum(PRICES) / len(PRICES))
+    assert seller["price"]["percentiles"]["p50"] == 4.5
+
+    nobody = client.get("/api/products/stats?user_id=nobody", headers=auth_headers).json()
+    assert nobody["count"] == 0 and nobody["price"] is None
+
+def test_stats_follow_writes(client: TestClient, test_user, auth_headers, monkeypatch):
+    """Prueba que crear y borrar productos actualiza las estadísticas del vendedor"""
+    from routers.products import catalogue_stats
+    monkeypatch.setattr(catalogue_stats, "refresh_interval", 0.05)
+    url = f"/api/products/stats?user_id={test_user.id}"
+
+    def wait_for_count(expected):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            body = client.get(url, headers=auth_headers).json()
+            if body["count"] == expected:
+                return body
+            time.sleep(0.05)
+        pytest.fail(f"stats never reached count={expected}")
+
+    created = client.post("/api/products/", headers=auth_headers,
+                          json={"name": "Stat", "description": "Counted", "price": 42.0}).json()
+    body = wait_for_count(1)
+    assert body["price"]["max"] == 42.0
+    client.delete(f"/api/products/{created['id']}", headers=auth_headers)
+    wait_for_count(0)
+
+def test_stats_full_reload_keeps_recent_writes(db, test_user, async_sessions):
+    """Prueba que una recarga completa desde una réplica atrasada no pierde las escrituras recientes"""
+    _add_products(db, test_user.id, [1.0, 2.0])
+    catalogue = stats.CatalogueStats(async_sessions)
+
+    async def lagging_replica():
+        # La réplica todavía no tiene los productos del vendedor
+        return []
+
+    catalogue._load_all = lagging_replica
+
+    async def scenario():
+        catalogue._ready = asyncio.Event()
+        catalogue.mark_dirty(test_user.id)
+        await catalogue.refresh()
+        return json.loads(await catalogue.get(test_user.id)), json.loads(await catalogue.get())
+
+    seller, everything = asyncio.run(scenario())
+    assert seller["count"] == 2 and everything["count"] == 2
+    assert catalogue.stats()["reloads"] == 1
+
+async def _reload():
+    from routers.products import catalogue_stats
+    catalogue_stats._loaded_at = None
+    await catalogue_stats.refresh()
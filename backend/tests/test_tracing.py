@@ -0,0 +1,76 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+from core import tracing
+from core.tracing import JsonlExporter, Trace, span
+
+
+def _timings(header: str) -> dict:
+    entries = {}
+    for entry in header.split(","):
+        name, *params = entry.strip().split(";")
+        entries[name] = dict(param.split("=", 1) for param in params)
+    return entries
+
+def test_server_timing_header(client: TestClient, test_product, auth_headers):
+    """Prueba que las respuestas incluyen las fases de la petición en Server-Timing"""
+    response = client.get(f"/api/products/{test_product.id}", headers=auth_headers)
+    assert response.status_code == 200
+    timings = _timings(response.headers["server-timing"])
+    for phase in ("jwt", "auth", "query", "serialize", "endpoint", "total"):
+        assert phase in timings
+        assert float(timings[phase]["dur"]) >= 0
+    # El endpoint se mide una sola vez aunque include_router recree la ruta
+    assert float(timings["endpoint"]["dur"]) <= float(timings["total"]["dur"])
+
+def test_server_timing_commit_phase(client: TestClient, auth_headers):
+    """Prueba que las escrituras reportan la fase de commit"""
+    response = client.post(
+        "/api/products/",
+        headers=auth_headers,
+        json={"name": "Traced", "description": "Traced product", "price": 1.5},
+    )
+    assert response.status_code == 201
+    assert "commit" in _timings(response.headers["server-timing"])
+
+def test_span_outside_request():
+    """Prueba que span no hace nada fuera de una petición"""
+    with span("query"):
+        pass
+    assert tracing.current_trace() is None
+
+def test_n_plus_one_detection(monkeypatch):
+    """Prueba que el modo debug detecta sentencias repetidas y demasiadas sentencias"""
+    monkeypatch.setattr(tracing, "TRACE_DEBUG", True)
+    monkeypatch.setattr(tracing, "TRACE_MAX_STATEMENTS", 10)
+    monkeypatch.setattr(tracing, "TRACE_MAX_REPEATS", 3)
+    trace = Trace("GET", "/api/products/")
+    trace.statements["SELECT users.id FROM users WHERE users.id = ?"] += 12
+    trace.db_statements = 12
+    problems = trace.problems()
+    assert len(problems) == 2
+    assert "12 statements" in problems[0]
+    assert "repeated 12 times" in problems[1]
+
+def test_no_detection_without_debug(monkeypatch):
+    """Prueba que sin modo debug no se guardan las sentencias"""
+    monkeypatch.setattr(tracing, "TRACE_DEBUG", False)
+    trace = Trace("GET", "/api/products/")
+    trace.db_statements = 1000
+    assert trace.problems() == []
+
+def test_jsonl_exporter(tmp_path):
+    """Prueba que el exportador escribe una línea JSON por traza"""
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonlExporter(str(path), batch_size=2)
+    for _ in range(3):
+        trace = Trace("GET", "/api/products/")
+        trace.add_span("query", 0.002)
+        exporter.export(trace)
+    # Los dos primeros registros se escriben al completar el lote
+    assert len(path.read_text().splitlines()) == 2
+    exporter.flush()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 3
+    assert records[0]["spans"]["query"] == 2.0
@@ -39,6 +39,17 @@ def test_update_user_email(client: TestClient, auth_headers):
     data = response.json()
     assert data["email"] == "updated@example.com"
 
+def test_update_user_email_taken(client: TestClient, db, auth_headers, test_user):
+    """Prueba que cambiar el email a uno ya registrado da 400 y no modifica el usuario"""
+    db.add(User(id="00000000-0000-7000-8000-0000000000d1", name="Other", email="other@example.com", password="x", is_active=True))
+    db.commit()
+    response = client.put("/api/users/me", json={"name": "Renamed", "email": "other@example.com"},
+                          headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+    me = client.get("/api/users/me", headers=auth_headers).json()
+    assert me["email"] == test_user.email and me["name"] == test_user.name
+
 def test_update_user_password(client: TestClient, auth_headers):
     """Prueba actualizar la contraseña del usuario"""
     response = client.put(
@@ -63,3 +74,48 @@ def test_delete_user(client: TestClient, auth_headers, db, test_user):
     # Verificar que el usuario ha sido desactivado
     user = db.query(User).filter(User.id == test_user.id).first()
     assert not user.is_active
+
+def test_current_user_is_cached(client: TestClient, auth_headers, test_user):
+    """Prueba que el usuario autenticado se sirve desde la caché en peticiones repetidas"""
+    from routers.users import principal_cache
+    hits, misses = principal_cache.hits, principal_cache.misses
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    assert principal_cache.misses == misses + 1
+    assert principal_cache.hits == hits + 1
+
+def test_update_user_invalidates_cache(client: TestClient, auth_headers):
+    """Prueba que la caché no devuelve datos viejos tras actualizar el perfil"""
+    client.get("/api/users/me", headers=auth_headers)
+    client.put("/api/users/me", json={"name": "Renamed User"}, headers=auth_headers)
+    response = client.get("/api/users/me", headers=auth_headers)
+    assert response.json()["name"] == "Renamed User"
+
+def test_deleted_user_not_served_from_cache(client: TestClient, auth_headers):
+    """Prueba que un usuario desactivado no se sirve desde la caché"""
+    assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    assert client.delete("/api/users/me", headers=auth_headers).status_code == 204
+    response = client.get("/api/users/me", headers=auth_headers)
+    assert response.status_code == 403
+
+def test_replica_reads_are_not_cached(client: TestClient, auth_headers, test_user):
+    """Prueba que un usuario leído de una réplica no se guarda en la caché de usuarios"""
+    from db.database import get_db
+    from main import app
+    from routers.users import principal_cache
+    primary = app.dependency_overrides[get_db]
+
+    async def replica_db():
+        async for session in primary():
+            # Lo que RoutingSession anota cuando la sesión lee de una réplica
+            session.info["replica_engine"] = "replica0"
+            yield session
+
+    app.dependency_overrides[get_db] = replica_db
+    try:
+        assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+        assert principal_cache.get(test_user.id) is None
+    finally:
+        app.dependency_overrides[get_db] = primary
+    client.get("/api/users/me", headers=auth_headers)
+    assert principal_cache.get(test_user.id) is not None
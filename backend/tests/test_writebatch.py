@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+from uuid import uuid4
+
+from core.writebatch import WriteCoalescer
+from models.models import Product
+
+
+def _row(user_id="00000000-0000-7000-8000-0000000000e1", id=None):
+    now = datetime.utcnow()
+    return {"id": id or str(uuid4()), "name": "Batched", "description": "Batched", "price": 1.0,
+            "user_id": user_id, "created_at": now, "updated_at": now}
+
+
+def test_group_commit_batches_concurrent_inserts(db, async_sessions):
+    """Prueba que las inserciones concurrentes se confirman en lotes de como máximo max_batch"""
+    writer = WriteCoalescer(async_sessions, Product.__table__, window_ms=50, max_batch=10)
+
+    async def run():
+        rows = await asyncio.gather(*(writer.insert(_row()) for _ in range(25)))
+        await writer.stop()
+        return rows
+
+    rows = asyncio.run(run())
+    assert len({row["id"] for row in rows}) == 25
+    assert db.query(Product).count() == 25
+    assert writer.stats()["batches"] == 3
+    assert writer.stats()["rows"] == 25
+
+def test_group_commit_isolates_failures(db, async_sessions):
+    """Prueba que una fila inválida solo falla en su propia petición"""
+    writer = WriteCoalescer(async_sessions, Product.__table__, window_ms=50)
+    duplicate = str(uuid4())
+
+    async def run():
+        results = await asyncio.gather(
+            writer.insert(_row(id=duplicate)), writer.insert(_row()), writer.insert(_row(id=duplicate)),
+            return_exceptions=True,
+        )
+        await writer.stop()
+        return results
+
+    first, second, third = asyncio.run(run())
+    assert first["id"] == duplicate and second["id"] != duplicate
+    assert isinstance(third, IntegrityError)
+    assert db.query(Product).count() == 2
+    assert writer.stats()["retried_batches"] == 1 and writer.stats()["failed_rows"] == 1
+
+def test_create_product_with_group_commit(client: TestClient, auth_headers, test_user, monkeypatch):
+    """Prueba que POST /api/products/ con commit agrupado devuelve y lista el producto"""
+    import routers.products as products
+    from db.database import recent_writers
+    monkeypatch.setattr(products, "GROUP_COMMIT_ENABLED", True)
+    before = products.product_writer.stats()["rows"]
+    response = client.post("/api/products/", headers=auth_headers,
+                           json={"name": "Grouped", "description": "Grouped", "price": 3.5})
+    assert response.status_code == 201
+    created = response.json()
+    assert created["user_id"] == test_user.id and created["price"] == 3.5
+    assert products.product_writer.stats()["rows"] == before + 1
+    # Las lecturas siguientes del creador van al primario
+    assert recent_writers.get(test_user.id) is True
+    recent_writers.clear()
+    listed = client.get(f"/api/products/{created['id']}", headers=auth_headers).json()
+    assert listed == created
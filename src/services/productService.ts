@@ -44,11 +44,28 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Listings leave out the description unless asked for; the cards show it
+const CARD_FIELDS = 'id,name,description,price,user_id,created_at,updated_at';
+
+// Listings come one page at a time; X-Next-Cursor points at the next one
+const PAGE_SIZE = 1000;
+
+const getAllPages = async (url: string, params: Record<string, string | number>): Promise<Product[]> => {
+  const products: Product[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get(url, { params: { ...params, limit: PAGE_SIZE, cursor } });
+    products.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return products;
+};
+
 export const productService = {
   // Get all products
   getProducts: async (): Promise<Product[]> => {
     try {
-      const response = await api.get('/products');
+      const response = await api.get('/products', { params: { fields: CARD_FIELDS } });
       return response.data;
     } catch (error) {
       throw error;
@@ -97,8 +114,7 @@ export const productService = {
   // Get user's products
   getUserProducts: async (): Promise<Product[]> => {
     try {
-      const response = await api.get('/products/user');
-      return response.data;
+      return await getAllPages('/products/user', { fields: CARD_FIELDS });
     } catch (error) {
       throw error;
     }